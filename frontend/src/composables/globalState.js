@@ -15,7 +15,8 @@ export const activeProject = reactive({
   introText: '',
   outroText: '',
   newFileCount: 0,
-  visualizerMap: null
+  visualizerMap: null,
+  tokenEncoding: 'cl100k_base'
 })
 export const statusMessage = ref('')
 export const statusVisible = ref(false)
@@ -42,6 +43,8 @@ export const editorFontSize = ref(DEFAULT_FONT_SIZE)
 
 // Indexing/Loading State
 export const isProjectLoading = ref(false)
+// Latest 'cm-scan-progress' payload: { dirs, files, files_per_sec, current, elapsed }
+export const scanProgress = ref(null)
 
 // Persistence for AI Review Window
 // path -> 'pending' | 'applied' | 'rejected' | 'deleted' | 'skipped'
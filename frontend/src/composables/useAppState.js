@@ -90,6 +90,26 @@ export function useAppState() {
           refreshProject(e.detail)
         })
 
+        // Selected files edited outside CodeMerger; only the changed counts are sent
+        window.addEventListener('cm-token-delta', (e) => {
+          const { base_dir, files, total_tokens } = e.detail
+          if (globalState.activeProject.path !== base_dir) return
+          for (const f of globalState.activeProject.selectedFiles) {
+            const update = files[f.path]
+            if (update) {
+              f.tokens = update.tokens
+              f.lines = update.lines
+            }
+          }
+          globalState.activeProject.totalTokens = total_tokens
+        })
+
+        window.addEventListener('cm-scan-progress', (e) => {
+          if (globalState.isProjectLoading.value) {
+            globalState.scanProgress.value = e.detail
+          }
+        })
+
         window.addEventListener('cm-config-updated', (e) => {
           globalState.config.value = e.detail
         })
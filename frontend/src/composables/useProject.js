@@ -1,4 +1,5 @@
-import { activeProject, statusMessage, isProjectLoading, showColorPicker, originalProjectColor } from './globalState'
+import { activeProject, statusMessage, isProjectLoading, scanProgress, showColorPicker, originalProjectColor } from './globalState'
+import { decodeTree } from '../utils/treeWire'
 
 export function useProject() {
   const applyProjectData = (projData) => {
@@ -18,6 +19,7 @@ export function useProject() {
       activeProject.outroText = projData.outro_text || ''
       activeProject.newFileCount = projData.new_file_count || 0
       activeProject.visualizerMap = projData.visualizer_map || null
+      activeProject.tokenEncoding = projData.token_encoding || 'cl100k_base'
       console.log("[useProject] newFileCount updated to:", activeProject.newFileCount);
       if (projData.status_msg) {
         statusMessage.value = projData.status_msg
@@ -37,6 +39,7 @@ export function useProject() {
       activeProject.outroText = ''
       activeProject.newFileCount = 0
       activeProject.visualizerMap = null
+      activeProject.tokenEncoding = 'cl100k_base'
 
       if (projData && projData.status_msg) {
         statusMessage.value = projData.status_msg
@@ -71,6 +74,7 @@ export function useProject() {
   const loadProject = async (path) => {
     if (!path) return
     statusMessage.value = 'Loading project...'
+    scanProgress.value = null
     isProjectLoading.value = true
     try {
       const proj = await window.pywebview.api.load_project(path)
@@ -81,6 +85,7 @@ export function useProject() {
       }
     } finally {
       isProjectLoading.value = false
+      scanProgress.value = null
     }
   }
 
@@ -90,6 +95,13 @@ export function useProject() {
     }
   }
 
+  const setTokenEncoding = async (encoding) => {
+    if (window.pywebview) {
+      const proj = await window.pywebview.api.set_token_encoding(encoding)
+      if (proj) applyProjectData(proj)
+    }
+  }
+
   const renameProject = async (newName) => {
     if (window.pywebview) {
       const proj = await window.pywebview.api.rename_project(newName)
@@ -158,7 +170,37 @@ export function useProject() {
 
   const getFileTree = async (filterText, isExtFilter, isGitFilter, currentSelectedPaths) => {
     if (window.pywebview) {
-      return await window.pywebview.api.get_file_tree(filterText, isExtFilter, isGitFilter, currentSelectedPaths)
+      return decodeTree(await window.pywebview.api.get_file_tree(filterText, isExtFilter, isGitFilter, currentSelectedPaths, true))
+    }
+    return []
+  }
+
+  const getFileTreeDelta = async (sinceVersion, filterText, isExtFilter, isGitFilter, currentSelectedPaths, expandedDirs) => {
+    if (window.pywebview) {
+      const result = await window.pywebview.api.get_file_tree_delta(sinceVersion, filterText, isExtFilter, isGitFilter, currentSelectedPaths, expandedDirs ?? null, true)
+      if (result && result.full) result.tree = decodeTree(result.tree)
+      return result
+    }
+    return { version: 0, full: true, tree: [] }
+  }
+
+  const getTreeChildren = async (dirPath, filterText, isExtFilter, isGitFilter, currentSelectedPaths, expandedDirs) => {
+    if (window.pywebview) {
+      return await window.pywebview.api.get_tree_children(dirPath, filterText, isExtFilter, isGitFilter, currentSelectedPaths, expandedDirs)
+    }
+    return []
+  }
+
+  const getTreeFiles = async (dirPath, filterText, isExtFilter, isGitFilter, currentSelectedPaths) => {
+    if (window.pywebview) {
+      return await window.pywebview.api.get_tree_files(dirPath, filterText, isExtFilter, isGitFilter, currentSelectedPaths)
+    }
+    return []
+  }
+
+  const findFiles = async (query, limit) => {
+    if (window.pywebview) {
+      return await window.pywebview.api.find_files(query, limit)
     }
     return []
   }
@@ -232,6 +274,7 @@ export function useProject() {
     loadProject,
     cancelLoadProject,
     renameProject,
+    setTokenEncoding,
     removeRecentProject,
     switchProfile,
     createProfile,
@@ -240,6 +283,10 @@ export function useProject() {
     clearUnknownFiles,
     addAllNewFiles,
     getFileTree,
+    getFileTreeDelta,
+    getTreeChildren,
+    getTreeFiles,
+    findFiles,
     updateProjectFiles,
     copyOrderRequest,
     openFile,
@@ -1,3 +1,5 @@
+import { decodeTree } from '../utils/treeWire'
+
 export function useStarter() {
   const clearStarterSession = async () => {
     if (window.pywebview) {
@@ -15,7 +17,7 @@ export function useStarter() {
   const getTodoQuestions = async () => window.pywebview ? await window.pywebview.api.get_todo_questions() : {}
   const getTodoTemplate = async () => window.pywebview ? await window.pywebview.api.get_todo_template() : ""
   const getBaseProjectData = async (path) => window.pywebview ? await window.pywebview.api.get_base_project_data(path) : null
-  const getBaseFileTree = async (path, filter, ext, git, sel) => window.pywebview ? await window.pywebview.api.get_base_file_tree(path, filter, ext, git, sel) : []
+  const getBaseFileTree = async (path, filter, ext, git, sel) => window.pywebview ? decodeTree(await window.pywebview.api.get_base_file_tree(path, filter, ext, git, sel, true)) : []
   const getTokenCountForPath = async (base, rel) => window.pywebview ? await window.pywebview.api.get_token_count_for_path(base, rel) : 0
   const generateConceptPrompt = async (data, qMap) => window.pywebview ? await window.pywebview.api.generate_concept_prompt(data, qMap) : ""
   const generateStackPrompt = async (data) => window.pywebview ? await window.pywebview.api.generate_stack_prompt(data) : ""
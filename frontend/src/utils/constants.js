@@ -1,5 +1,6 @@
 export const COMPACT_TITLE_MAX_LEN = 8;
 export const DEFAULT_TOKEN_COLOR_THRESHOLD = 4000;
+export const TOKEN_ENCODINGS = ['cl100k_base', 'o200k_base'];
 
 export const WINDOW_SIZES = {
   FILE_MANAGER: { width: 1100, height: 800 },
@@ -11,6 +11,7 @@ export const fileManagerInfo = {
   "fm_tokens": "Total Tokens: A real-time estimate of context usage. As the grow count grows, the color changes from gray to yellow to red to warn you about LLM context limits.",
   "fm_order": "Order Request: Click to copy a prompt asking for the optimal file order. Ctrl-click to directly apply a new order list from your clipboard.",
   "fm_tokens_item": "Token Stats: Shows the token count for this file. Text color shifts from gray to red as a file grows larger. Ctrl-click to copy a breakup request. Alt-click to 'ignore' this file's tokens in coloring warnings.",
+  "fm_token_encoding": "Tokenizer: The encoding used to count tokens for this project. cl100k_base matches gpt-4, o200k_base matches gpt-4o and newer models. Changing it recounts the merge lists of all profiles.",
   "fm_list_item": "Merge Item: Double-click to open this file in your editor. Click to select for sorting, which also scrolls the Available Files tree to this item with a subtle highlight.",
   "fm_sort_top": "Move to Top: Place the selected files at the beginning of the merge list.",
   "fm_sort_up": "Move Up: Shift the selected files one position higher in the order.",
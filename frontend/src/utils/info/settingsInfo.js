@@ -3,6 +3,7 @@ export const settingsInfo = {
   "set_app": "Various settings related to application behavior.",
   "set_app_new_file": "File Monitoring: Monitors your project folder for new files added since your last session. Disable this if you do not want new file warnings or do not want to spend resources on it.",
   "set_app_interval": "Check Interval: How frequently CodeMerger scans the disk for changes. Lower values are more responsive, but may impact performance on slow drives.",
+  "set_app_scan_threads": "Parallel Scanning: Lists several folders at the same time while scanning a project. Speeds up loading projects on network drives (NFS/SMB) considerably; leave it off for local disks.",
   "set_app_secrets": "Secret Scanning: Uses 'detect-secrets' to look for API keys or private credentials before you copy. Enable this to prevent accidentally sharing sensitive data with the language model.",
   "set_app_feedback": "AI Response Review: Automatically open the response review window when wrapped sections can be found.",
   "set_app_compact": "Compact Mode: Automatically switches to the compact window whenever you minimize the main window. When enabled, the minimize button in the dashboard header switches behavior to minimize the application normally to the taskbar.",
@@ -11,6 +12,7 @@ export const settingsInfo = {
 
   "set_fm": "Settings that determine the behavior of the merge list editor.",
   "set_fm_tokens": "Token Counting: Calculates context usage based on the gpt-4 tokenizer. Disable this if you want to speed up file indexing in extremely large projects.",
+  "set_fm_token_mode": "Token Count Mode: 'Exact' tokenizes every file before it is listed. 'Estimate first' shows an estimate based on file size right away (marked with ~) and replaces it with the exact count once it has been calculated in the background. Estimates are calibrated on files that were already counted.",
   "set_fm_limit": "Context Limit: Set a target token count (e.g. 200000 for ChatGPT). The token count in the merge list editor will turn red if you exceed this.",
   "set_fm_threshold": "Add All Safety: A warning threshold for the 'Add All' button. Prevents accidentally adding a large amount of files to your merge list.",
   "set_fm_alert_threshold": "New File Warning: When applying AI changes that create new files, CodeMerger will skip the confirmation dialog if the count of new files is below this number. Deletions always trigger a warning.",
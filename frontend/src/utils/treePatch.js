@@ -0,0 +1,53 @@
+/**
+ * Applies file tree change operations produced by the backend FileTreeModel.
+ * Nodes are looked up through a path index, so patching never walks the whole tree.
+ */
+
+/**
+ * Builds a path -> node map for the given nodes and all their descendants.
+ * Pass the reactive tree so the indexed nodes are the reactive proxies.
+ */
+export const indexTree = (nodes, index = new Map()) => {
+  const stack = [...nodes]
+  while (stack.length) {
+    const node = stack.pop()
+    index.set(node.path, node)
+    if (node.children) stack.push(...node.children)
+  }
+  return index
+}
+
+const siblingsOf = (tree, index, parentPath) => {
+  if (!parentPath) return tree
+  const parent = index.get(parentPath)
+  return parent ? parent.children : null
+}
+
+/**
+ * Applies 'add', 'remove' and 'update' operations in order.
+ * Returns false if an operation does not fit the tree, in which case a full reload is needed.
+ */
+export const applyTreeOps = (tree, index, ops) => {
+  for (const op of ops) {
+    if (op.op === 'update') {
+      const node = index.get(op.path)
+      if (!node) return false
+      Object.assign(node, op.node)
+      continue
+    }
+
+    const siblings = siblingsOf(tree, index, op.parent)
+    if (!siblings) return false
+
+    if (op.op === 'add') {
+      siblings.splice(op.index, 0, op.node)
+      indexTree([siblings[op.index]], index)
+    } else if (op.op === 'remove') {
+      const pos = siblings.findIndex(n => n.path === op.path)
+      if (pos === -1) return false
+      const [removed] = siblings.splice(pos, 1)
+      for (const path of indexTree([removed]).keys()) index.delete(path)
+    }
+  }
+  return true
+}
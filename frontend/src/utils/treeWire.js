@@ -0,0 +1,27 @@
+/**
+ * Decodes the compact file tree wire format produced by the backend's encode_tree.
+ *   - folder: [name, [children...]]
+ *   - file:   [name, code], where code = reason index * 2 + is_new
+ * Paths are rebuilt from the parent chain. Plain node arrays are returned unchanged.
+ */
+export const decodeTree = (payload) => {
+  if (!payload || !payload.compact) return payload || []
+  const reasons = payload.reasons
+
+  const decodeLevel = (encoded, parentPath) => {
+    const nodes = new Array(encoded.length)
+    for (let i = 0; i < encoded.length; i++) {
+      const [name, data] = encoded[i]
+      const path = parentPath ? `${parentPath}/${name}` : name
+      if (Array.isArray(data)) {
+        nodes[i] = { name, path, type: 'dir', children: decodeLevel(data, path) }
+      } else {
+        const reason = reasons[data >> 1]
+        nodes[i] = { name, path, type: 'file', is_new: (data & 1) === 1, is_filtered: reason !== '', filter_reason: reason }
+      }
+    }
+    return nodes
+  }
+
+  return decodeLevel(payload.nodes, '')
+}
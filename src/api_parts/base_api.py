@@ -1,4 +1,5 @@
 import threading
+from .. import constants as c
 
 class BaseApi:
     """Provides base state and shared helper methods for the API mixins"""
@@ -14,6 +15,11 @@ class BaseApi:
         self._load_cancel_event = threading.Event()
         self._dialog_lock = threading.Lock()
 
+        # Exact token counts owed to the File Manager in 'estimate' mode: base_dir -> {rel_path: None}
+        self._exact_token_lock = threading.Lock()
+        self._exact_token_pending = {}
+        self._exact_token_worker = None
+
         self.app_state = app_state
         self.project_manager = project_manager
 
@@ -46,6 +52,7 @@ class BaseApi:
             "project_name": project_config.project_name,
             "project_color": project_config.project_color,
             "project_font_color": project_config.project_font_color,
+            "token_encoding": project_config.token_encoding or c.TOKEN_ENCODING_DEFAULT,
             "active_profile": project_config.active_profile_name,
             "profiles": profiles_meta,
             "new_file_count": len(project_config.unknown_files),
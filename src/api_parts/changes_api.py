@@ -1,7 +1,10 @@
 import os
+import time
+import hashlib
 import logging
 import pyperclip
-from src.core.utils import get_token_count_for_text, get_file_hash
+from src.core.token_cache import get_file_token_info
+from src.core.tokenizer import tokenizer
 from src.core import change_applier
 from src.core.highlighter import get_highlighted_diff, get_pygments_css
 from src.core.merger import get_language_from_path
@@ -9,6 +12,26 @@ from .. import constants as c
 
 log = logging.getLogger("CodeMerger")
 
+def _applied_file_info(full_path, rel_path, content):
+    """
+    Token info of a file that was just written. If it cannot be read back, the info is
+    derived from the sanitized content, which is exactly what was written to disk.
+    """
+    info = get_file_token_info(full_path)
+    if info is not None:
+        return info
+    log.warning(f"Could not read back {rel_path} after applying it; counting the applied content instead.")
+    sanitized = change_applier._sanitize_content(rel_path, content)
+    raw = sanitized.encode('utf-8')
+    try:
+        mtime = os.path.getmtime(full_path)
+    except OSError:
+        mtime = time.time()
+    return {
+        'tokens': tokenizer.count(sanitized), 'lines': sanitized.count('\n') + 1,
+        'mtime': mtime, 'size': len(raw), 'hash': hashlib.sha1(raw).hexdigest()
+    }
+
 class ChangesApi:
     """API methods routing Markdown parsing, applying changes, and reviewing diffs."""
 
@@ -76,19 +99,17 @@ class ChangesApi:
         project_config.is_dirty = True
         success, err = change_applier.apply_single_file(project_config.base_dir, rel_path, content)
         if success:
-            sanitized = change_applier._sanitize_content(rel_path, content)
+            # The file on disk holds exactly the sanitized content; counting it also seeds the token cache
             full_path = os.path.join(project_config.base_dir, rel_path)
-            tokens = get_token_count_for_text(sanitized)
-            lines = sanitized.count('\n') + 1
-            mtime = os.path.getmtime(full_path)
-            f_hash = get_file_hash(full_path)
+            info = _applied_file_info(full_path, rel_path, content)
+            tokens, lines, mtime, f_hash = info['tokens'], info['lines'], info['mtime'], info['hash']
 
             file_was_in_active_list = False
             for p_name, p_data in project_config.profiles.items():
                 found = False
                 for f_info in p_data.get('selected_files', []):
                     if f_info['path'] == rel_path:
-                        f_info.update({'tokens': tokens, 'lines': lines, 'mtime': mtime, 'hash': f_hash})
+                        f_info.update({'tokens': tokens, 'lines': lines, 'mtime': mtime, 'size': info['size'], 'hash': f_hash})
                         found = True
                         if p_name == project_config.active_profile_name:
                             file_was_in_active_list = True
@@ -98,7 +119,7 @@ class ChangesApi:
             if not file_was_in_active_list:
                 project_config.selected_files.append({
                     'path': rel_path, 'tokens': tokens, 'lines': lines,
-                    'mtime': mtime, 'hash': f_hash
+                    'mtime': mtime, 'size': info['size'], 'hash': f_hash
                 })
                 project_config.update_known_files([rel_path], project_config.active_profile_name)
 
@@ -214,25 +235,17 @@ class ChangesApi:
             for rel_path in all_changed_paths:
                 full_path = os.path.join(project_config.base_dir, rel_path)
                 if not os.path.isfile(full_path): continue
-                mtime = os.path.getmtime(full_path)
-                f_hash = get_file_hash(full_path)
-                try:
-                    with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        raw = f.read()
-                    sanitized = change_applier._sanitize_content(rel_path, raw)
-                    tokens = get_token_count_for_text(sanitized)
-                    lines = sanitized.count('\n') + 1
-                except Exception:
-                    tokens, lines = 0, 0
+                info = _applied_file_info(full_path, rel_path, actual_updates.get(rel_path, creations.get(rel_path)))
+                tokens, lines, mtime, f_hash = info['tokens'], info['lines'], info['mtime'], info['hash']
 
                 found_in_active = False
                 for f_info in project_config.selected_files:
                     if f_info['path'] == rel_path:
-                        f_info.update({'tokens': tokens, 'lines': lines, 'mtime': mtime, 'hash': f_hash})
+                        f_info.update({'tokens': tokens, 'lines': lines, 'mtime': mtime, 'size': info['size'], 'hash': f_hash})
                         found_in_active = True
                         break
                 if not found_in_active:
-                    project_config.selected_files.append({'path': rel_path, 'tokens': tokens, 'lines': lines, 'mtime': mtime, 'hash': f_hash})
+                    project_config.selected_files.append({'path': rel_path, 'tokens': tokens, 'lines': lines, 'mtime': mtime, 'size': info['size'], 'hash': f_hash})
 
             project_config.update_known_files(list(all_changed_paths), project_config.active_profile_name)
 
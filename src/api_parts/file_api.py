@@ -2,11 +2,14 @@ import os
 import json
 import pyperclip
 import logging
+import threading
 import subprocess
-from src.core.utils import get_token_count_for_text, get_file_hash
+from src.core.token_cache import token_cache, get_file_token_info, get_files_token_info
 from src.core.file_tree_builder import build_file_tree_data
-from src.core.merger import generate_output_string
-from src.core.file_scanner import get_project_inventory
+from src.core.tree_cache import tree_cache_key, count_tree_nodes
+from src.core.tree_wire import encode_tree
+from src.core.merger import MergeWriter
+from src.core.file_scanner import get_project_inventory, get_scan_worker_count
 from .. import constants as c
 
 log = logging.getLogger("CodeMerger")
@@ -14,8 +17,12 @@ log = logging.getLogger("CodeMerger")
 class FileApi:
     """API methods concerning the file tree, file parsing, and the merge list."""
 
-    def get_file_tree(self, filter_text="", is_ext_filter=True, is_git_filter=True, current_selected_paths=None):
-        """Returns the project file tree data structure, enhanced with metadata."""
+    def get_file_tree(self, filter_text="", is_ext_filter=True, is_git_filter=True, current_selected_paths=None, compact=False):
+        """
+        Returns the project file tree data structure, enhanced with metadata.
+        With 'compact' the tree is packed by encode_tree for a faster bridge transfer.
+        """
+        self.project_manager.mark_user_activity()
         project_config = self.project_manager.get_current_project()
         if not project_config:
             return []
@@ -31,6 +38,114 @@ class FileApi:
 
         unknown_files = set(project_config.unknown_files)
 
+        inventory = self._get_tree_inventory(base_dir, is_git_filter)
+
+        # Repeated opens and filter toggles are served from the cache until the inventory changes
+        tree_cache = self.project_manager.tree_cache
+        cache_key = None
+        if inventory is not None:
+            cache_key = ('compact' if compact else 'tree',) + tree_cache_key(inventory.revision, file_extensions, filter_text, is_ext_filter, is_git_filter, selected_paths, unknown_files)
+            tree = tree_cache.get(cache_key)
+            if tree is not None:
+                return tree
+
+        # Build tree - uses the enriched metadata in inventory for instant results
+        tree = build_file_tree_data(
+            base_dir=base_dir,
+            file_extensions=file_extensions,
+            gitignore_patterns=None,
+            filter_text=filter_text,
+            is_extension_filter_active=is_ext_filter,
+            selected_file_paths=selected_paths,
+            is_gitignore_filter_active=is_git_filter,
+            unknown_files=unknown_files,
+            inventory=inventory,
+            path_index=self.project_manager.get_path_index(inventory)
+        )
+        node_count = count_tree_nodes(tree)
+        if compact:
+            tree = encode_tree(tree)
+        if cache_key is not None:
+            tree_cache.put(cache_key, tree, node_count)
+        return tree
+
+    def get_file_tree_delta(self, since_version=0, filter_text="", is_ext_filter=True, is_git_filter=True, current_selected_paths=None, expanded_dirs=None, compact=False):
+        """
+        Returns the file tree as changes against the caller's copy at 'since_version':
+        {'version', 'base', 'full': False, 'ops': [...]}, or {'version', 'full': True, 'tree': [...]}
+        when the caller is out of sync or the filters changed. Passing 'expanded_dirs' allows a
+        lazy payload ('lazy': True) for large trees; see get_tree_children.
+        With 'compact', full non-lazy trees are packed by encode_tree.
+        """
+        view = self._get_tree_view(filter_text, is_ext_filter, is_git_filter, current_selected_paths)
+        if view is None:
+            return {'version': 0, 'full': True, 'tree': []}
+        result = self.project_manager.tree_model.sync(since_version, expanded_dirs, **view)
+        if compact and result['full'] and not result.get('lazy'):
+            result['tree'] = encode_tree(result['tree'])
+        return result
+
+    def get_tree_children(self, dir_path, filter_text="", is_ext_filter=True, is_git_filter=True, current_selected_paths=None, expanded_dirs=None):
+        """Returns the child nodes of a folder in a lazy tree, including its expanded descendants."""
+        view = self._get_tree_view(filter_text, is_ext_filter, is_git_filter, current_selected_paths)
+        if view is None:
+            return []
+        return self.project_manager.tree_model.children(dir_path, expanded_dirs or (), **view)
+
+    def get_tree_files(self, dir_path, filter_text="", is_ext_filter=True, is_git_filter=True, current_selected_paths=None):
+        """Returns all visible file paths below a folder ('' for the whole tree) of a lazy tree."""
+        view = self._get_tree_view(filter_text, is_ext_filter, is_git_filter, current_selected_paths)
+        if view is None:
+            return []
+        return self.project_manager.tree_model.files_under(dir_path, **view)
+
+    def find_files(self, query, limit=c.FUZZY_FINDER_MAX_RESULTS):
+        """Quick-open: returns the best fuzzy matches for 'query' as {path, score, positions} dicts."""
+        self.project_manager.mark_user_activity()
+        if not self.project_manager.get_current_project():
+            return []
+        inventory, _ = self.project_manager.get_inventory()
+        # Built by the file monitor; the first query after a project load may have to build it
+        finder = self.project_manager.get_fuzzy_finder(inventory, build=True)
+        if finder is None:
+            return []
+        return finder.search(query, limit)
+
+    def _get_tree_view(self, filter_text, is_ext_filter, is_git_filter, current_selected_paths):
+        """Collects the FileTreeModel arguments for the active project, or None without a project."""
+        self.project_manager.mark_user_activity()
+        project_config = self.project_manager.get_current_project()
+        if not project_config:
+            return None
+
+        base_dir = project_config.base_dir
+        from src.core.utils import load_active_file_extensions
+        file_extensions = load_active_file_extensions()
+
+        if current_selected_paths is not None:
+            selected_paths = set(current_selected_paths)
+        else:
+            selected_paths = {f['path'] for f in project_config.selected_files}
+
+        inventory = self._get_tree_inventory(base_dir, is_git_filter)
+        if not inventory:
+            return None
+
+        return {
+            'base_dir': base_dir,
+            'inventory': inventory,
+            'file_extensions': file_extensions,
+            'filter_text': filter_text,
+            'is_ext_filter': is_ext_filter,
+            'is_git_filter': is_git_filter,
+            'selected_paths': selected_paths,
+            'unknown_files': project_config.unknown_files,
+            'get_changes': self.project_manager.get_inventory_changes,
+            'path_index': self.project_manager.get_path_index(inventory)
+        }
+
+    def _get_tree_inventory(self, base_dir, is_git_filter):
+        """Returns the inventory the file tree is built from, scanning synchronously if none is cached yet."""
         # Inventory Retrieval
         inventory, _ = self.project_manager.get_inventory()
 
@@ -43,7 +158,7 @@ class FileApi:
 
             if root_count < 50:
                 log.debug("Small project detected. Performing synchronous inventory.")
-                raw_inv = get_project_inventory(base_dir)
+                raw_inv = get_project_inventory(base_dir, workers=get_scan_worker_count(self.app_state.config))
                 from src.core.file_scanner import enrich_inventory
                 inventory = enrich_inventory(base_dir, raw_inv)
                 self.project_manager.set_inventory(inventory)
@@ -52,26 +167,20 @@ class FileApi:
                 with self.project_manager._scan_lock:
                     inventory, _ = self.project_manager.get_inventory()
                     if not inventory:
-                        raw_inv = get_project_inventory(base_dir)
+                        raw_inv = get_project_inventory(base_dir, workers=get_scan_worker_count(self.app_state.config))
                         from src.core.file_scanner import enrich_inventory
                         inventory = enrich_inventory(base_dir, raw_inv)
                         self.project_manager.set_inventory(inventory)
 
-        # Build tree - uses the enriched metadata in inventory for instant results
-        return build_file_tree_data(
-            base_dir=base_dir,
-            file_extensions=file_extensions,
-            gitignore_patterns=None,
-            filter_text=filter_text,
-            is_extension_filter_active=is_ext_filter,
-            selected_file_paths=selected_paths,
-            is_gitignore_filter_active=is_git_filter,
-            unknown_files=unknown_files,
-            inventory=inventory
-        )
+        if not is_git_filter and inventory:
+            # Gitignored directories are collapsed in the inventory; walk them only when shown
+            inventory = self.project_manager.get_expanded_inventory(base_dir)
+
+        return inventory
 
     def get_token_count(self, file_path):
         """Calculates token count for a specific file relative to project root."""
+        self.project_manager.mark_user_activity()
         project_config = self.project_manager.get_current_project()
         if not project_config:
             return 0
@@ -80,24 +189,86 @@ class FileApi:
         if not os.path.isfile(full_path):
             return 0
 
-        try:
-            with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            return get_token_count_for_text(content)
-        except Exception:
-            return 0
+        info = get_file_token_info(full_path)
+        return info['tokens'] if info else 0
+
+    def get_token_counts(self, file_paths):
+        """
+        Batch form of get_token_count for folder and 'add all' selections: one bridge call,
+        with files read concurrently and tokenized by the batch encoder.
+        Returns a dict {rel_path: tokens}; unreadable files count as 0.
+        """
+        self.project_manager.mark_user_activity()
+        project_config = self.project_manager.get_current_project()
+        if not project_config or not file_paths:
+            return {}
+
+        base_dir = project_config.base_dir
+        infos = get_files_token_info([os.path.join(base_dir, p) for p in file_paths])
+        return {p: (info['tokens'] if info else 0) for p, info in zip(file_paths, infos)}
+
+    def get_token_count_preview(self, file_paths):
+        """
+        Token counts for the File Manager list, honoring the 'token_count_mode' setting.
+        In 'estimate' mode uncached files are estimated from their size and listed in 'estimated';
+        their exact counts follow in a "cm-token-exact" event once a background pass counted them.
+        Returns {'counts': {rel_path: tokens}, 'estimated': [rel_path, ...]}
+        """
+        if self.app_state.config.get('token_count_mode', c.TOKEN_COUNT_MODE_DEFAULT) != 'estimate':
+            return {'counts': self.get_token_counts(file_paths), 'estimated': []}
+
+        self.project_manager.mark_user_activity()
+        project_config = self.project_manager.get_current_project()
+        if not project_config or not file_paths:
+            return {'counts': {}, 'estimated': []}
+
+        base_dir = project_config.base_dir
+        estimates = token_cache.estimate_files([os.path.join(base_dir, p) for p in file_paths])
+        counts = {p: (e['tokens'] if e else 0) for p, e in zip(file_paths, estimates)}
+        estimated = [p for p, e in zip(file_paths, estimates) if e and not e['exact']]
+        if estimated:
+            self._queue_exact_token_counts(base_dir, estimated)
+        return {'counts': counts, 'estimated': estimated}
+
+    def _queue_exact_token_counts(self, base_dir, file_paths):
+        """Adds files to the exact count backlog; a single worker thread drains it."""
+        with self._exact_token_lock:
+            pending = self._exact_token_pending.setdefault(base_dir, {})
+            pending.update(dict.fromkeys(file_paths))
+            if self._exact_token_worker is None:
+                self._exact_token_worker = threading.Thread(target=self._exact_token_loop, daemon=True)
+                self._exact_token_worker.start()
+
+    def _exact_token_loop(self):
+        while True:
+            with self._exact_token_lock:
+                if not self._exact_token_pending:
+                    self._exact_token_worker = None
+                    return
+                base_dir, pending = self._exact_token_pending.popitem()
+            try:
+                self._send_exact_token_counts(base_dir, list(pending))
+            except Exception as e:
+                log.error(f"Exact token counting failed: {e}")
+
+    def _send_exact_token_counts(self, base_dir, file_paths):
+        """Counts estimated files exactly and pushes the results to the main window."""
+        infos = get_files_token_info([os.path.join(base_dir, p) for p in file_paths])
+        counts = {p: (info['tokens'] if info else 0) for p, info in zip(file_paths, infos)}
+        if self._window_manager and self._window_manager.main_window:
+            detail = json.dumps({'base_dir': base_dir, 'counts': counts})
+            try:
+                self._window_manager.main_window.evaluate_js(f'window.dispatchEvent(new CustomEvent("cm-token-exact", {{ detail: {detail} }}))')
+            except Exception as e:
+                log.debug(f"Could not deliver exact token counts: {e}")
 
     def get_token_count_for_path(self, base_dir, rel_path):
         """Used by Step 2 File Manager to calculate tokens for base project files."""
         full_path = os.path.join(base_dir, rel_path)
         if not os.path.isfile(full_path):
             return 0
-        try:
-            with open(full_path, 'r', encoding='utf-8-sig', errors='ignore') as f:
-                content = f.read()
-            return get_token_count_for_text(content)
-        except Exception:
-            return 0
+        info = get_file_token_info(full_path)
+        return info['tokens'] if info else 0
 
     def clear_unknown_files(self):
         """
@@ -137,24 +308,17 @@ class FileApi:
 
         added_count = 0
         project_config.is_dirty = True
-        for path in files_to_add:
-            full_path = os.path.join(base_dir, path)
-            try:
-                with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-
-                mtime = os.path.getmtime(full_path)
-                file_hash = get_file_hash(full_path)
-                tokens = get_token_count_for_text(content)
-                lines = content.count('\n') + 1
-
-                project_config.selected_files.append({
-                    'path': path, 'mtime': mtime, 'hash': file_hash,
-                    'tokens': tokens, 'lines': lines
-                })
-                added_count += 1
-            except Exception as e:
-                log.error(f"Failed to process new file {path}: {e}")
+        infos = get_files_token_info([os.path.join(base_dir, path) for path in files_to_add])
+        for path, info in zip(files_to_add, infos):
+            if info is None:
+                log.error(f"Failed to process new file {path}: unreadable")
+                continue
+
+            project_config.selected_files.append({
+                'path': path, 'mtime': info['mtime'], 'size': info['size'], 'hash': info['hash'],
+                'tokens': info['tokens'], 'lines': info['lines']
+            })
+            added_count += 1
 
         project_config.total_tokens = sum(f.get('tokens', 0) for f in project_config.selected_files)
 
@@ -177,18 +341,20 @@ class FileApi:
         if not project_config:
             return False
 
-        project_config.selected_files = selected_files
-        project_config.total_tokens = total_tokens
+        # Serialized with the file monitor, which revalidates selected files' token counts
+        with self.project_manager._lock:
+            project_config.selected_files = selected_files
+            project_config.total_tokens = total_tokens
 
-        if expanded_dirs is not None:
-            project_config.expanded_dirs = set(expanded_dirs)
+            if expanded_dirs is not None:
+                project_config.expanded_dirs = set(expanded_dirs)
 
-        project_config.unknown_files = []
+            project_config.unknown_files = []
 
-        current_paths = [f['path'] for f in selected_files]
-        project_config.update_known_files(current_paths, project_config.active_profile_name)
+            current_paths = [f['path'] for f in selected_files]
+            project_config.update_known_files(current_paths, project_config.active_profile_name)
 
-        project_config.save()
+            project_config.save()
         self._broadcast_reload()
         return True
 
@@ -198,36 +364,26 @@ class FileApi:
         if not project_config or not selected_files:
             return "Failed to generate request: No files selected."
 
-        orig_selection = project_config.selected_files
-        project_config.selected_files = selected_files
-
         try:
-            merged_code, _ = generate_output_string(
-                base_dir=project_config.base_dir,
-                project_config=project_config,
-                use_wrapper=False,
-                copy_merged_prompt=""
-            )
-
-            if not merged_code:
-                return "Failed to generate request: Could not merge file content."
-
             paths = [f['path'] for f in selected_files]
             json_payload = json.dumps(paths, indent=2)
 
             from src.core import prompts as p
-            final_string = p.ORDER_REQUEST_PROMPT_TEMPLATE.format(
-                json_payload=json_payload,
-                merged_code=merged_code
+            writer = MergeWriter()
+            writer.write_template(
+                p.ORDER_REQUEST_PROMPT_TEMPLATE, 'merged_code',
+                lambda: writer.write_file_blocks(project_config.base_dir, paths),
+                json_payload=json_payload
             )
 
-            pyperclip.copy(final_string)
+            if not writer.block_count:
+                return "Failed to generate request: Could not merge file content."
+
+            pyperclip.copy(writer.getvalue())
             return "Order request with file content copied to clipboard."
         except Exception as e:
             log.error(f"Error generating order request: {e}")
             return f"Error: {str(e)}"
-        finally:
-            project_config.selected_files = orig_selection
 
     def get_visualizer_prompt(self, previous_map_json=None):
         """Generates the prompt for the LLM to build the visualizer tree, including full source code."""
@@ -235,18 +391,10 @@ class FileApi:
         if not project_config:
             return ""
 
-        from src.core.merger import generate_output_string
-        merged_code, _ = generate_output_string(
-            base_dir=project_config.base_dir,
-            project_config=project_config,
-            use_wrapper=False,
-            copy_merged_prompt=""
-        )
-
-        if not merged_code:
+        selected_files = project_config.selected_files
+        if not selected_files:
             return "Error: Merge list is empty."
 
-        selected_files = project_config.selected_files
         file_count = len(selected_files)
         file_list_str = "\n".join([f"- {f['path']}" for f in selected_files])
 
@@ -255,12 +403,17 @@ class FileApi:
             prev_context = f"\n**Previous Mapping for Reference:**\nTo maintain architectural consistency, please try to preserve the existing structure, domain assignments, and node names where appropriate, while integrating the recent changes. Only output the final JSON.\n```json\n{previous_map_json}\n```\n"
 
         from src.core import prompts as p
-        return p.VISUALIZER_GENERATION_PROMPT.format(
+        writer = MergeWriter()
+        writer.write_template(
+            p.VISUALIZER_GENERATION_PROMPT, 'merged_content',
+            lambda: writer.write_file_blocks(project_config.base_dir, [f['path'] for f in selected_files]),
             file_count=file_count,
             file_list=file_list_str,
-            previous_map_context=prev_context,
-            merged_content=merged_code
+            previous_map_context=prev_context
         )
+        if not writer.block_count:
+            return "Error: Merge list is empty."
+        return writer.getvalue()
 
     def save_visualizer_map(self, map_data):
         """Saves the generated visualizer map to the active project profile."""
@@ -278,17 +431,17 @@ class FileApi:
         if not project_config:
             return ""
 
-        from src.core.merger import generate_subset_output
-        new_files_code = generate_subset_output(project_config.base_dir, missing_paths)
-
         obsolete_list = "\n".join([f"- {p}" for p in obsolete_paths]) if obsolete_paths else "None"
 
         from src.core import prompts as p
-        return p.VISUALIZER_UPDATE_PROMPT.format(
+        writer = MergeWriter()
+        writer.write_template(
+            p.VISUALIZER_UPDATE_PROMPT, 'new_files_content',
+            lambda: writer.write_file_blocks(project_config.base_dir, missing_paths),
             current_tree=previous_tree_json,
-            obsolete_list=obsolete_list,
-            new_files_content=new_files_code
+            obsolete_list=obsolete_list
         )
+        return writer.getvalue()
 
     def get_visualizer_amend_prompt(self, missing_paths, duplicate_paths):
         from src.core import prompts as p
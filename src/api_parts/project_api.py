@@ -4,6 +4,9 @@ import subprocess
 import webview
 import logging
 from src.core.project_config import ProjectConfig
+from src.core.tokenizer import tokenizer
+from src.core.token_cache import get_files_token_info
+from .. import constants as c
 
 log = logging.getLogger("CodeMerger")
 
@@ -55,7 +58,11 @@ class ProjectApi:
                 self._load_cancel_event.clear()
                 self.clear_parsed_plan()
 
-                project_config, status_msg = self.project_manager.load_project(path, cancel_event=self._load_cancel_event)
+                project_config, status_msg = self.project_manager.load_project(
+                    path,
+                    cancel_event=self._load_cancel_event,
+                    on_progress=self._window_manager.broadcast_scan_progress if self._window_manager else None
+                )
 
                 if self._load_cancel_event.is_set():
                     return {"status_msg": "Load cancelled."}
@@ -153,6 +160,29 @@ class ProjectApi:
         self._broadcast_reload()
         return self._format_project_response(project_config, "Project color saved.")
 
+    def set_token_encoding(self, encoding):
+        """Selects the tokenizer encoding of the active project and recounts every profile's selection."""
+        project_config = self.project_manager.get_current_project()
+        if not project_config or encoding not in c.TOKEN_ENCODINGS:
+            return None
+
+        project_config.token_encoding = None if encoding == c.TOKEN_ENCODING_DEFAULT else encoding
+        tokenizer.set_active_encoding(encoding)
+
+        base_dir = project_config.base_dir
+        for p_data in project_config.profiles.values():
+            selected = p_data.get('selected_files', [])
+            infos = get_files_token_info([os.path.join(base_dir, f['path']) for f in selected])
+            for f_info, info in zip(selected, infos):
+                if info:
+                    f_info.update({'tokens': info['tokens'], 'lines': info['lines'], 'mtime': info['mtime'], 'size': info['size'], 'hash': info['hash']})
+                    f_info.pop('estimated', None)
+            p_data['total_tokens'] = sum(f.get('tokens') or 0 for f in selected if not f.get('ignoreTokens'))
+        project_config.save()
+
+        self._broadcast_reload()
+        return self._format_project_response(project_config, f"Token counts now use {encoding}.")
+
     def select_directory(self):
         """Opens native OS directory selection dialog specifically for general directory selection."""
         if not self._window_manager or not self._window_manager.main_window:
@@ -4,8 +4,10 @@ import logging
 import json
 from pathlib import Path
 from src.core.project_config import ProjectConfig
-from src.core.utils import parse_gitignore, load_config
+from src.core.utils import load_config
 from src.core.file_tree_builder import build_file_tree_data
+from src.core.tree_cache import tree_cache_key, count_tree_nodes
+from src.core.tree_wire import encode_tree
 from src import constants as c
 
 log = logging.getLogger("CodeMerger")
@@ -41,29 +43,52 @@ class StarterApiScaffold:
             log.error(f"Failed to load base project config: {e}")
             return None
 
-    def get_base_file_tree(self, path, filter_text="", is_ext_filter=True, is_git_filter=True, selected_paths=None):
-        """Returns the file tree for a base project path. Used in Step 2."""
+    def get_base_file_tree(self, path, filter_text="", is_ext_filter=True, is_git_filter=True, selected_paths=None, compact=False):
+        """Returns the file tree for a base project path, packed by encode_tree with 'compact'. Used in Step 2."""
         if not path or not os.path.isdir(path):
             return []
 
         from src.core.utils import load_active_file_extensions
         file_extensions = load_active_file_extensions()
-        gitignore_patterns = parse_gitignore(path)
 
         sel_set = set()
         if selected_paths:
             sel_set = {f['path'] for f in selected_paths}
 
-        raw_tree = build_file_tree_data(
+        # Short filters carry no trigram, so the filter index is only consulted from three characters on
+        wants_index = len(filter_text) >= 3
+        # The active project already has a live inventory; other projects go through the reference cache
+        active_config = self.project_manager.get_current_project()
+        if active_config and os.path.normcase(os.path.abspath(active_config.base_dir)) == os.path.normcase(os.path.abspath(path)):
+            inventory = self._get_tree_inventory(active_config.base_dir, is_git_filter)
+            tree_cache = self.project_manager.tree_cache
+            path_index = self.project_manager.get_path_index(inventory) if wants_index else None
+        else:
+            references = self.project_manager.reference_inventories
+            inventory = references.get(path, is_git_filter)
+            tree_cache = references.tree_cache
+            path_index = references.get_path_index(path, inventory) if wants_index else None
+
+        cache_key = ('compact' if compact else 'tree',) + tree_cache_key(inventory.revision, file_extensions, filter_text, is_ext_filter, is_git_filter, sel_set, ())
+        tree = tree_cache.get(cache_key)
+        if tree is not None:
+            return tree
+
+        tree = build_file_tree_data(
             base_dir=path,
             file_extensions=file_extensions,
-            gitignore_patterns=gitignore_patterns,
             filter_text=filter_text,
             is_extension_filter_active=is_ext_filter,
             selected_file_paths=sel_set,
-            is_gitignore_filter_active=is_git_filter
+            is_gitignore_filter_active=is_git_filter,
+            inventory=inventory,
+            path_index=path_index
         )
-        return raw_tree
+        node_count = count_tree_nodes(tree)
+        if compact:
+            tree = encode_tree(tree)
+        tree_cache.put(cache_key, tree, node_count)
+        return tree
 
     def create_starter_project(self, llm_output, include_base_reference, project_pitch, _unused_data=None):
         """Initial check for directory existence before scaffolding project."""
@@ -2,15 +2,68 @@
 RECENT_PROJECTS_MAX = 25
 MAX_SECRET_SCAN_REPORT_LINES = 10
 TOKEN_COUNT_ENABLED_DEFAULT = True
+# 'exact' tokenizes every file; 'estimate' answers from file sizes first and corrects in the background
+TOKEN_COUNT_MODE_DEFAULT = "exact"
+TOKEN_COUNT_MODES = ("exact", "estimate")
+# Estimator: bytes per token before any calibration, and exact tokens needed before an extension's own ratio is used
+TOKEN_ESTIMATE_BYTES_PER_TOKEN = 4.0
+TOKEN_ESTIMATE_MIN_CALIBRATION_TOKENS = 5000
+# tiktoken encoding used for token counts unless a project selects another (cl100k_base matches gpt-4, o200k_base gpt-4o and newer)
+TOKEN_ENCODING_DEFAULT = "cl100k_base"
+TOKEN_ENCODINGS = ("cl100k_base", "o200k_base")
+# Recent text token counts remembered by the tokenizer registry
+TOKENIZER_MEMO_MAX_ENTRIES = 4096
+# Persistent per-file token count cache: entry cap and minimum seconds between writes
+TOKEN_CACHE_MAX_ENTRIES = 100000
+TOKEN_CACHE_SAVE_INTERVAL_SECONDS = 30
+# Threads used to read and tokenize files in batch token counts, and files per tokenizer batch
+TOKEN_BATCH_THREADS = 8
+TOKEN_BATCH_SIZE = 64
+# Background token precomputation: work per monitor cycle, user idle time before it runs, and file size cap
+TOKEN_PRECOMPUTE_SECONDS_PER_CYCLE = 0.5
+TOKEN_PRECOMPUTE_IDLE_SECONDS = 3
+TOKEN_PRECOMPUTE_MAX_FILE_BYTES = 1024 * 1024
 ADD_ALL_WARNING_THRESHOLD_DEFAULT = 100
 NEW_FILE_ALERT_THRESHOLD_DEFAULT = 5
 STATUS_FADE_SECONDS = 5
 
 # Performance Thresholds
+# Characters copied per read when streaming source files into merge output
+MERGE_READ_CHUNK_CHARS = 1024 * 1024
+# Rendered merge blocks kept in memory for repeated copies: total size, and largest file that is cached
+BLOCK_CACHE_MAX_BYTES = 64 * 1024 * 1024
+BLOCK_CACHE_MAX_FILE_BYTES = 1024 * 1024
 # Projects larger than this will trigger CPU protection/throttling
 LARGE_PROJECT_THRESHOLD = 1000
 # Scans faster than this will ignore adaptive throttling multipliers
 FAST_SCAN_THRESHOLD_SECONDS = 0.5
+# Native watcher batching: quiet period that closes a batch, and the hard cap on a single batch
+FILE_WATCH_DEBOUNCE_SECONDS = 0.3
+FILE_WATCH_MAX_BATCH_SECONDS = 2.0
+# Directories listed concurrently during a scan (1 = sequential); higher values help on network mounts
+SCAN_WORKER_THREADS_DEFAULT = 1
+SCAN_WORKER_THREADS_MAX = 32
+# Minimum time between rewrites of a project's on-disk inventory snapshot
+INVENTORY_SNAPSHOT_INTERVAL_SECONDS = 30
+# Minimum time between scan progress events sent to the frontend
+SCAN_PROGRESS_INTERVAL_SECONDS = 0.25
+# Number of inventory deltas remembered so the file tree model can patch instead of rebuild
+INVENTORY_CHANGE_LOG_SIZE = 64
+# Visible file count above which the file manager loads folders on expansion only
+LAZY_TREE_FILE_THRESHOLD = 20000
+# Quick-open fuzzy finder: results returned per query and candidates scored at most
+FUZZY_FINDER_MAX_RESULTS = 50
+FUZZY_FINDER_MAX_CANDIDATES = 1500
+# Built file trees kept for repeated opens and filter toggles; bounded by count and total nodes
+TREE_CACHE_MAX_ENTRIES = 8
+TREE_CACHE_MAX_NODES = 400000
+# Inventories of reference projects (Project Starter base projects), bounded by count, idle age and memory
+INVENTORY_CACHE_MAX_PROJECTS = 4
+INVENTORY_CACHE_MAX_AGE_SECONDS = 600
+INVENTORY_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Rough in-memory cost of one inventory row, including the scanner snapshot behind it
+INVENTORY_CACHE_BYTES_PER_FILE = 300
+INVENTORY_CACHE_RECHECK_SECONDS = 5
 
 # File System
 # Explicit directories to ignore for performance during recursive scans
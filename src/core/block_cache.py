@@ -0,0 +1,66 @@
+import os
+import threading
+from collections import OrderedDict
+from .. import constants as c
+
+class BlockCache:
+    """
+    In-memory LRU of rendered merge blocks (marker header, fenced content, footer).
+    Entries are keyed by the file and its relative path in the header, and are only served
+    while the file's (size, mtime_ns) still match, so a repeated copy of unchanged files
+    costs one stat each. The total size of cached blocks is kept under BLOCK_CACHE_MAX_BYTES
+    (measured in characters). The file monitor drops entries of files it sees change.
+    """
+    def __init__(self, max_bytes=c.BLOCK_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # (normalized full path, rel path) -> (size, mtime_ns, block)
+        self._entries = OrderedDict()
+        self._total = 0
+
+    @staticmethod
+    def _file_key(full_path):
+        return os.path.normcase(os.path.abspath(full_path))
+
+    def get(self, full_path, rel_path, st):
+        key = (self._file_key(full_path), rel_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] != st.st_size or entry[1] != st.st_mtime_ns:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def put(self, full_path, rel_path, st, block):
+        if len(block) > self.max_bytes:
+            return
+        key = (self._file_key(full_path), rel_path)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (st.st_size, st.st_mtime_ns, block)
+            self._total += len(block)
+            while self._total > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._total -= len(evicted)
+
+    def invalidate(self, full_paths):
+        """Drops the blocks of the given files, whatever relative path they were rendered under."""
+        file_keys = {self._file_key(p) for p in full_paths}
+        with self._lock:
+            for key in [k for k in self._entries if k[0] in file_keys]:
+                self._remove(key)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total -= len(entry[2])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total = 0
+
+block_cache = BlockCache()
@@ -3,8 +3,14 @@ import time
 import logging
 import os
 import sys
-from .utils import parse_gitignore
-from .file_scanner import get_project_inventory, enrich_inventory
+import json
+from collections import deque
+from .file_scanner import enrich_inventory, apply_inventory_delta, get_scan_worker_count
+from .inotify_watcher import InotifyWatcher, WatchLimitReached
+from .scan_progress import ScanProgress
+from .token_cache import token_cache
+from .tokenizer import tokenizer
+from .block_cache import block_cache
 from .. import constants as c
 
 log = logging.getLogger("CodeMerger")
@@ -23,6 +29,22 @@ class FileMonitorThread(threading.Thread):
         self._stop_event = threading.Event()
         self._force_check_event = threading.Event()
 
+        # Pending inventory snapshot write, throttled by INVENTORY_SNAPSHOT_INTERVAL_SECONDS
+        self._snapshot_pending = False
+        self._last_snapshot_time = 0
+        # Identity of the config/filetypes the last full reconciliation ran against
+        self._reconciled_config = None
+        self._reconciled_extensions = None
+
+        # Native change watcher (Linux only); None means the polling loop is used
+        self._watcher = None
+
+        # Known files still to be tokenized in the background, filled per (project, encoding)
+        # and topped up with the paths touched by each new inventory revision
+        self._token_queue = deque()
+        self._token_queue_key = None
+        self._token_queue_revision = None
+
     def stop(self):
         self._stop_event.set()
         self._force_check_event.set()
@@ -41,16 +63,79 @@ class FileMonitorThread(threading.Thread):
             except Exception:
                 pass
 
+    def _init_watcher(self):
+        if not InotifyWatcher.is_supported():
+            return
+        try:
+            self._watcher = InotifyWatcher()
+            log.info("File Monitor: Using native inotify change notifications.")
+        except Exception as e:
+            log.warning(f"File Monitor: inotify unavailable ({e}). Falling back to polling.")
+            self._watcher = None
+
+    def _disable_watcher(self, reason):
+        log.warning(f"File Monitor: {reason}. Falling back to polling.")
+        if self._watcher:
+            self._watcher.close()
+        self._watcher = None
+
+    def _sync_watches(self, base_dir, scanner):
+        if not self._watcher:
+            return
+        try:
+            self._watcher.sync(base_dir, scanner.get_directories())
+        except WatchLimitReached as e:
+            self._disable_watcher(str(e))
+
+    def _wait_for_changes(self, idle_interval):
+        """
+        Blocks until the watcher reports changes, a check is forced, or the idle interval passes.
+        Returns the set of dirty relative directories, or None if a full incremental scan is
+        required (forced check, kernel queue overflow or idle timeout). The idle scan backs up
+        the event stream: files created in a new directory before its watch was added emit no event.
+        """
+        deadline = time.monotonic() + idle_interval
+        while not self._stop_event.is_set():
+            if self._force_check_event.is_set():
+                return None
+
+            dirty, overflowed = self._watcher.read_events(0.5)
+            if overflowed:
+                return None
+
+            if dirty:
+                # Debounce: absorb bursts (checkouts, installs, builds) into a single batch
+                batch_deadline = time.monotonic() + c.FILE_WATCH_MAX_BATCH_SECONDS
+                while time.monotonic() < batch_deadline and not self._stop_event.is_set():
+                    more, overflowed = self._watcher.read_events(c.FILE_WATCH_DEBOUNCE_SECONDS)
+                    if overflowed:
+                        return None
+                    if not more:
+                        break
+                    dirty |= more
+                return dirty
+
+            if time.monotonic() >= deadline:
+                return None
+        return None
+
     def run(self):
         log.info("File Monitor background thread started.")
         self._set_low_priority()
+        self._init_watcher()
 
+        dirty_dirs = None
         while not self._stop_event.is_set():
             config = self.app_state.config
             start_time = time.perf_counter()
+            check_enabled = config.get('enable_new_file_check', True)
 
-            if config.get('enable_new_file_check', True):
-                self._perform_check()
+            if check_enabled:
+                self._perform_check(dirty_dirs)
+            if config.get('token_count_enabled', True):
+                self._refresh_selected_tokens()
+            # Token counts gathered by the UI are persisted from here, off the UI threads
+            token_cache.save()
 
             end_time = time.perf_counter()
             duration = end_time - start_time
@@ -58,12 +143,29 @@ class FileMonitorThread(threading.Thread):
             user_interval = config.get('new_file_check_interval', 5)
             adaptive_interval = max(user_interval, int(duration * 4)) if duration > c.FAST_SCAN_THRESHOLD_SECONDS else user_interval
 
+            # Background tokenizing only runs on cycles where the scan itself was cheap
+            if duration <= c.FAST_SCAN_THRESHOLD_SECONDS and config.get('token_count_enabled', True):
+                self._precompute_tokens()
+
             self._force_check_event.clear()
+            if self._watcher and check_enabled:
+                dirty_dirs = self._wait_for_changes(adaptive_interval)
+                continue
+
+            dirty_dirs = None
             for _ in range(int(adaptive_interval * 2)):
                 if self._stop_event.is_set() or self._force_check_event.is_set():
                     break
                 time.sleep(0.5)
 
+        if self._watcher:
+            self._watcher.close()
+
+        project_config = self.project_manager.get_current_project()
+        if project_config:
+            self._maybe_save_snapshot(project_config.base_dir, force=True)
+        token_cache.save(force=True)
+
     def _safe_eval(self, js_code):
         if not self.window: return
         try:
@@ -71,7 +173,115 @@ class FileMonitorThread(threading.Thread):
         except Exception as e:
             log.error(f"JS Eval Error: {e}")
 
-    def _perform_check(self):
+    def _maybe_save_snapshot(self, base_dir, force=False):
+        if not self._snapshot_pending:
+            return
+        if not force and time.monotonic() - self._last_snapshot_time < c.INVENTORY_SNAPSHOT_INTERVAL_SECONDS:
+            return
+        self._snapshot_pending = False
+        self._last_snapshot_time = time.monotonic()
+        self.project_manager.save_inventory_snapshot(base_dir)
+
+    def _precompute_tokens(self):
+        """
+        Tokenizes the project's known files into the shared token cache while the user is idle,
+        for at most TOKEN_PRECOMPUTE_SECONDS_PER_CYCLE per cycle. Already cached files cost a stat.
+        """
+        project_config = self.project_manager.get_current_project()
+        if not project_config:
+            return
+        inventory, _ = self.project_manager.get_inventory()
+        revision = inventory.revision if inventory else None
+        queue_key = (project_config.base_dir, tokenizer.active_encoding)
+        if queue_key != self._token_queue_key:
+            self._token_queue_key = queue_key
+            self._token_queue = deque(project_config.known_files)
+        elif revision != self._token_queue_revision:
+            touched = self.project_manager.get_inventory_changes(self._token_queue_revision, revision)
+            if touched is None:
+                self._token_queue = deque(project_config.known_files)
+            else:
+                known = set(project_config.known_files)
+                self._token_queue.extend(p for p in touched if p in known)
+        self._token_queue_revision = revision
+
+        base_dir = project_config.base_dir
+        deadline = time.perf_counter() + c.TOKEN_PRECOMPUTE_SECONDS_PER_CYCLE
+        while self._token_queue and time.perf_counter() < deadline:
+            if self._stop_event.is_set() or self.project_manager.is_user_active():
+                return
+            full_path = os.path.join(base_dir, self._token_queue.popleft())
+            try:
+                if os.path.getsize(full_path) > c.TOKEN_PRECOMPUTE_MAX_FILE_BYTES:
+                    continue
+            except OSError:
+                continue
+            token_cache.get_file_info(full_path)
+
+    def _refresh_selected_tokens(self):
+        """
+        Revalidates the token counts of the active profile's selection against the disk.
+        Entries whose (size, mtime) still match cost one stat; the others are recounted through
+        the token cache, which only hashes or tokenizes files whose content may have changed.
+        Changed counts are saved and sent as a "cm-token-delta" event instead of a full reload.
+        """
+        project_config = self.project_manager.get_current_project()
+        if not project_config or not project_config.selected_files:
+            return
+        base_dir = project_config.base_dir
+
+        stale = []
+        for f_info in project_config.selected_files:
+            try:
+                st = os.stat(os.path.join(base_dir, f_info['path']))
+            except OSError:
+                # Deleted files are pruned by the inventory check
+                continue
+            if f_info.get('estimated') or f_info.get('size') != st.st_size or f_info.get('mtime') != st.st_mtime:
+                stale.append((f_info, st))
+        if not stale or self._stop_event.is_set():
+            return
+
+        stale_paths = [os.path.join(base_dir, f['path']) for f, _ in stale]
+        # Rendered blocks would miss on their own stat check; dropping them frees the memory now
+        block_cache.invalidate(stale_paths)
+        infos = token_cache.get_files_info(stale_paths)
+
+        changed = {}
+        with self.project_manager._lock:
+            # The project or its selection may have been replaced while counting; the next cycle picks that up
+            if self.project_manager.project_config is not project_config:
+                return
+            current = {id(f) for f in project_config.selected_files}
+
+            metadata_changed = False
+            for (f_info, st), info in zip(stale, infos):
+                if id(f_info) not in current:
+                    continue
+                if info is None:
+                    # Unreadable: remember the stat so the file is not retried until it changes again
+                    update = {'mtime': st.st_mtime, 'size': st.st_size}
+                else:
+                    if f_info.get('tokens') != info['tokens'] or f_info.get('lines') != info['lines'] or f_info.get('estimated'):
+                        changed[f_info['path']] = {'tokens': info['tokens'], 'lines': info['lines']}
+                    update = {'tokens': info['tokens'], 'lines': info['lines'], 'mtime': info['mtime'], 'hash': info['hash'], 'size': info['size']}
+                if f_info.get('estimated') or any(f_info.get(k) != v for k, v in update.items()):
+                    f_info.pop('estimated', None)
+                    f_info.update(update)
+                    metadata_changed = True
+
+            if not metadata_changed:
+                return
+            project_config.total_tokens = sum(f.get('tokens') or 0 for f in project_config.selected_files if not f.get('ignoreTokens'))
+            project_config.save()
+            total_tokens = project_config.total_tokens
+
+        if changed:
+            log.info(f"Monitor: Recounted tokens of {len(changed)} changed selected file(s).")
+            detail = json.dumps({'base_dir': base_dir, 'files': changed, 'total_tokens': total_tokens})
+            self._safe_eval(f'window.dispatchEvent(new CustomEvent("cm-token-delta", {{ detail: {detail} }}))')
+
+    def _perform_check(self, dirty_dirs=None):
         project_config = self.project_manager.get_current_project()
         if not project_config: return
 
@@ -79,38 +289,80 @@ class FileMonitorThread(threading.Thread):
         if not os.path.isdir(base_dir): return
 
         try:
+            config_reloaded = False
             if project_config.has_external_changes():
                 log.info("External change detected in project configuration. Reloading.")
                 if project_config.load():
+                    config_reloaded = True
                     self._safe_eval('window.dispatchEvent(new CustomEvent("cm-project-reloaded"))')
 
             with self.project_manager._scan_lock:
-                raw_inventory = get_project_inventory(base_dir, cancel_event=self._stop_event)
-                if self._stop_event.is_set(): return
-                inventory = enrich_inventory(base_dir, raw_inventory)
-                self.project_manager.set_inventory(inventory)
+                scanner = self.project_manager.get_scanner(base_dir)
+                scanner.workers = get_scan_worker_count(self.app_state.config)
+                # Cold scans are logged with statistics; incremental ticks stay quiet
+                progress = None if scanner.has_state else ScanProgress(f"Inventory scan of {base_dir}")
+                delta = scanner.scan(cancel_event=self._stop_event, only_dirs=dirty_dirs, progress=progress)
+                if progress:
+                    progress.finish(cancelled=delta is None)
+                if delta is None or self._stop_event.is_set(): return
+                # The project was switched while scanning; the result belongs to the old one
+                if self.project_manager.project_config is not project_config: return
+                self._sync_watches(base_dir, scanner)
+
+                inventory, _ = self.project_manager.get_inventory()
+                added_items = None
+                if inventory is None or delta['full'] or delta['gitignores_changed']:
+                    inventory = enrich_inventory(base_dir, scanner.get_raw_inventory())
+                    self.project_manager.set_inventory(inventory)
+                    self._snapshot_pending = True
+                elif delta['added'] or delta['removed'] or delta['ignored_dirs'] != inventory.ignored_dirs:
+                    inventory, added_items = apply_inventory_delta(base_dir, inventory, delta)
+                    self.project_manager.set_inventory(inventory)
+                    self._snapshot_pending = True
+                else:
+                    added_items = []
+
+            self._maybe_save_snapshot(base_dir)
+            # Keep the search indexes current off the UI path; cheap when only a delta was applied
+            self.project_manager.get_path_index(inventory, build=True)
+            self.project_manager.get_fuzzy_finder(inventory, build=True)
 
             from .utils import load_active_file_extensions
             file_extensions = load_active_file_extensions()
             extensions = {ext for ext in file_extensions if ext.startswith('.')}
             exact_filenames = {ext for ext in file_extensions if not ext.startswith('.')}
 
-            all_files = inventory['files']
-            profile_all_files = []
-            for item in all_files:
-                if item['i']: continue
-                if item['e'] in extensions or item['n'] in exact_filenames:
-                    profile_all_files.append(item['p'])
+            def _is_profile_row(row):
+                _, name_lower, is_ignored, ext = row
+                return not is_ignored and (ext in extensions or name_lower in exact_filenames)
+
+            # A delta is only trustworthy against the exact state it was computed after.
+            # Anything that can change the filtered file set without touching disk forces a full pass.
+            needs_full_reconcile = (
+                added_items is None
+                or config_reloaded
+                or self._reconciled_config is not project_config
+                or self._reconciled_extensions != file_extensions
+            )
+            self._reconciled_config = project_config
+            self._reconciled_extensions = file_extensions
 
             known_set = set(project_config.known_files)
-            current_set = set(profile_all_files)
             config_changed = False
 
+            if needs_full_reconcile:
+                current_set = set(inventory.profile_paths(extensions, exact_filenames))
+                missing = known_set - current_set
+                candidates = current_set
+            else:
+                missing = set(delta['removed']) & known_set
+                candidates = {row[0] for row in added_items if _is_profile_row(row)}
+
             # Prune deleted
-            missing = known_set - current_set
             truly_deleted = {p for p in missing if not os.path.exists(os.path.join(base_dir, p))}
             if truly_deleted:
                 log.info(f"Monitor: Truly deleted {len(truly_deleted)} files.")
+                block_cache.invalidate([os.path.join(base_dir, p) for p in truly_deleted])
                 project_config.known_files = sorted(list(known_set - truly_deleted))
                 for p_data in project_config.profiles.values():
                     p_data['selected_files'] = [f for f in p_data.get('selected_files', []) if f['path'] not in truly_deleted]
@@ -118,7 +370,7 @@ class FileMonitorThread(threading.Thread):
                 config_changed = True
 
             # Detect New
-            brand_new = current_set - set(project_config.known_files)
+            brand_new = candidates - set(project_config.known_files)
             if brand_new:
                 log.info(f"Monitor: NEW files detected: {list(brand_new)}")
                 project_config.update_known_files(brand_new)
@@ -136,4 +388,4 @@ class FileMonitorThread(threading.Thread):
                     self._safe_eval('window.dispatchEvent(new CustomEvent("cm-project-reloaded"))')
 
         except Exception as e:
-            log.error(f"Error in FileMonitorThread: {e}")
\ No newline at end of file
+            log.error(f"Error in FileMonitorThread: {e}")
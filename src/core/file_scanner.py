@@ -1,93 +1,465 @@
 import os
 from ..core.utils import is_ignored
+from ..core.gitignore_matcher import get_rule_set, GitignoreRuleSet
+from ..core.parallel_walker import run_directory_walk
+from ..core.inventory import Inventory
+from ..core.git_index import get_git_index
 from .. import constants as c
 
-def enrich_inventory(base_dir, raw_inventory):
+def _read_gitignore_patterns(dir_path):
+    """Returns the cleaned pattern lines of a directory's .gitignore, or None if it has none."""
+    gitignore_path = os.path.join(dir_path, '.gitignore')
+    if not os.path.isfile(gitignore_path):
+        return None
+    try:
+        with open(gitignore_path, 'r', encoding='utf-8-sig') as f:
+            return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+    except (IOError, OSError):
+        return None
+
+def _is_skipped_entry(name_lower):
+    """Hard-coded performance anchors that are never part of the inventory."""
+    return (
+        name_lower in c.SPECIAL_FILES_TO_IGNORE
+        or name_lower.startswith(c.CODEMERGER_TEMP_PREFIX)
+        or name_lower == '.git'
+    )
+
+def _ignore_flags(base_dir, gitignores, rel_paths):
+    """Evaluates the ignore status of a batch of relative file paths."""
+    if not gitignores:
+        return [False] * len(rel_paths)
+    base_prefix = base_dir.replace('\\', '/').rstrip('/') + '/'
+    rule_set = get_rule_set(gitignores)
+
+    git_index = get_git_index(base_dir)
+    if git_index is None:
+        # Inventory entries are never directories, which spares dir-only rules a disk probe
+        return rule_set.match_many([base_prefix + p for p in rel_paths], is_dir=False)
+
+    # Tracked files are never ignored (same as git itself); only untracked files need matching
+    tracked = git_index.paths
+    untracked_flags = iter(rule_set.match_many([base_prefix + p for p in rel_paths if p not in tracked], is_dir=False))
+    return [False if p in tracked else next(untracked_flags) for p in rel_paths]
+
+def _walk_subtree_files(base_dir, rel_root, cancel_event=None):
+    """Lists every file below a directory, honoring only the hard-coded skip list."""
+    found = []
+    stack = [rel_root]
+    while stack:
+        if cancel_event and cancel_event.is_set():
+            break
+        rel_dir = stack.pop()
+        try:
+            for entry in os.scandir(os.path.join(base_dir, rel_dir)):
+                if _is_skipped_entry(entry.name.lower()):
+                    continue
+                rel_path = f"{rel_dir}/{entry.name}"
+                if entry.is_dir():
+                    stack.append(rel_path)
+                else:
+                    found.append(rel_path)
+        except OSError:
+            pass
+    return found
+
+def enrich_inventory(base_dir, raw_inventory, ignored_paths=None):
     """
-    Enriches a raw disk walk inventory with metadata (ignore status, extension).
+    Enriches a raw disk walk inventory with metadata (ignore status, extension) into a columnar Inventory.
     This moves expensive string/IO operations out of the UI build loop.
+    'ignored_paths' supplies known ignore verdicts (restored snapshots) and skips gitignore matching.
     """
-    base_dir_norm = os.path.abspath(base_dir).replace('\\', '/')
     gitignores = raw_inventory['gitignores']
+    rel_paths = raw_inventory['files']
 
-    enriched_files = []
-    for rel_path in raw_inventory['files']:
-        abs_path = os.path.join(base_dir, rel_path)
+    if ignored_paths is not None:
+        ignored_flags = [p in ignored_paths for p in rel_paths]
+    else:
+        ignored_flags = _ignore_flags(base_dir, gitignores, rel_paths)
 
-        # Store metadata to make UI filtering O(1) per file
-        enriched_files.append({
-            'p': rel_path,                           # Path
-            'n': os.path.basename(rel_path).lower(), # Name (normalized)
-            'i': is_ignored(abs_path, base_dir_norm, gitignores), # Is Ignored
-            'e': os.path.splitext(rel_path.lower())[1] # Extension
-        })
+    return Inventory.build(rel_paths, ignored_flags, gitignores, raw_inventory.get('ignored_dirs', []))
 
-    # Sort enriched files by path (case-insensitive) for stable Trie construction
-    enriched_files.sort(key=lambda x: x['p'].lower())
+def apply_inventory_delta(base_dir, inventory, delta):
+    """
+    Produces a new Inventory by applying a scanner delta to an existing one.
+    Only the added files are enriched.
+    Returns a tuple: (new_inventory, added rows as (rel_path, name_lower, is_ignored, ext))
+    """
+    added = delta['added']
+    ignored_flags = _ignore_flags(base_dir, inventory.gitignores, added)
+    new_inventory = inventory.with_changes(
+        delta['removed'], zip(added, ignored_flags), ignored_dirs=delta.get('ignored_dirs')
+    )
 
-    return {
-        'files': enriched_files,
-        'gitignores': gitignores
-    }
+    added_rows = [
+        (p, os.path.basename(p).lower(), bool(flag), os.path.splitext(p.lower())[1])
+        for p, flag in zip(added, ignored_flags)
+    ]
+    return new_inventory, added_rows
 
-def get_project_inventory(base_dir, cancel_event=None):
+def get_ignored_subtree_count(base_dir, inventory, rel_dir):
     """
-    Performs a raw disk walk and returns a complete inventory of the project.
-    Returns a dict: { 'files': [rel_paths], 'gitignores': [(abs_root, [patterns])] }
-    This inventory is used as the raw source for tree building.
+    Returns the number of files inside a collapsed ignored directory.
+    Counted on first request and memoized on the inventory it belongs to.
     """
-    file_list = []
-    gitignore_data = []
+    counts = inventory.ignored_counts
+    if rel_dir not in counts:
+        counts[rel_dir] = len(_walk_subtree_files(base_dir, rel_dir))
+    return counts[rel_dir]
 
-    add_file = file_list.append
-    add_ignore = gitignore_data.append
+def expand_ignored_subtrees(base_dir, inventory, cancel_event=None):
+    """
+    Returns a copy of an Inventory where every collapsed ignored directory
+    has been walked and its files added as ignored rows.
+    Only needed when the UI shows gitignored content.
+    """
+    if not inventory.ignored_dirs:
+        return inventory
 
-    def _walk(current_path, current_rel_path):
-        if cancel_event and cancel_event.is_set():
-            return
-
-        # Discover local gitignore
-        gitignore_path = os.path.join(current_path, '.gitignore')
-        if os.path.isfile(gitignore_path):
-            try:
-                with open(gitignore_path, 'r', encoding='utf-8-sig') as f:
-                    patterns = [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
-                    if patterns:
-                        add_ignore((current_path.replace('\\', '/'), patterns))
-            except (IOError, OSError):
-                pass
+    added_rows = []
+    counts = {}
+    for rel_dir in inventory.ignored_dirs:
+        subtree = _walk_subtree_files(base_dir, rel_dir, cancel_event)
+        counts[rel_dir] = len(subtree)
+        added_rows.extend((rel_path, True) for rel_path in subtree)
 
-        try:
-            for entry in os.scandir(current_path):
-                name_lower = entry.name.lower()
-                # Skip hard-coded performance anchors
-                if name_lower in c.SPECIAL_FILES_TO_IGNORE or name_lower.startswith(c.CODEMERGER_TEMP_PREFIX):
-                    continue
+    expanded = inventory.with_changes((), added_rows, ignored_dirs=[])
+    expanded.ignored_counts = counts
+    return expanded
 
-                if name_lower == '.git':
-                    continue
+class IncrementalInventoryScanner:
+    """
+    Keeps a per-directory snapshot of a project (mtime + child listing) so that
+    repeated scans only re-read the directories whose mtime moved since the last tick.
+    Every call to scan() returns a delta of added and removed relative file paths.
+    Gitignored directories are never descended into; they are kept as collapsed
+    'ignored_dirs' entries (git cannot re-include files below an excluded directory).
+    """
+    def __init__(self, base_dir, workers=1):
+        self.base_dir = base_dir
+        # Number of directories listed concurrently (1 = sequential walk)
+        self.workers = workers
+        self._base_prefix = base_dir.replace('\\', '/').rstrip('/') + '/'
+        # rel_dir -> {'mtime': st_mtime_ns, 'files': [names], 'dirs': [names], 'ignored': {names}}
+        self._dirs = {}
+        # rel_dir -> (st_mtime_ns of its .gitignore, [patterns])
+        self._gitignores = {}
+        self._rules = None
+        self._git_index = None
 
-                rel_path = f"{current_rel_path}/{entry.name}" if current_rel_path else entry.name
+    @property
+    def has_state(self):
+        return bool(self._dirs)
+
+    def reset(self):
+        self._dirs = {}
+        self._gitignores = {}
+        self._rules = None
+        self._git_index = None
+
+    def _abs_dir(self, rel_dir):
+        return os.path.join(self.base_dir, rel_dir) if rel_dir else self.base_dir
 
+    def _list_dir(self, abs_dir):
+        files = []
+        dirs = []
+        try:
+            for entry in os.scandir(abs_dir):
+                if _is_skipped_entry(entry.name.lower()):
+                    continue
                 if entry.is_dir():
-                    _walk(entry.path, rel_path)
+                    dirs.append(entry.name)
                 else:
-                    # We store ALL files in the inventory.
-                    # Gitignore and Extension filtering happens during Trie building in the API.
-                    add_file(rel_path)
+                    files.append(entry.name)
         except OSError:
             pass
+        return files, dirs
+
+    @staticmethod
+    def _probe_gitignore(abs_dir, cached):
+        """
+        Returns the (mtime_ns, patterns) entry for a directory's .gitignore, or None if it has none.
+        The file is only re-read when its mtime moved compared to 'cached'. Safe on worker threads.
+        """
+        # Editing a .gitignore does not touch its parent directory mtime, so it is probed separately
+        try:
+            mtime = os.stat(os.path.join(abs_dir, '.gitignore')).st_mtime_ns
+        except OSError:
+            return None
+        if cached and cached[0] == mtime:
+            return cached
+        return (mtime, _read_gitignore_patterns(abs_dir) or [])
+
+    def _store_gitignore(self, rel_dir, entry):
+        """Records a probed .gitignore entry. Returns True if the rules changed."""
+        if entry is None:
+            if self._gitignores.pop(rel_dir, None) is None:
+                return False
+        elif self._gitignores.get(rel_dir) is entry:
+            return False
+        else:
+            self._gitignores[rel_dir] = entry
+        self._rules = None
+        return True
+
+    def _fetch_dir(self, item):
+        """
+        I/O half of a directory visit, run on the walker threads.
+        Returns (mtime, gitignore entry, listing or None if unchanged), or None if the directory is gone.
+        """
+        rel_dir, known_mtime, cached_gitignore, force_list = item
+        abs_dir = self._abs_dir(rel_dir)
+        try:
+            mtime = os.stat(abs_dir).st_mtime_ns
+        except OSError:
+            return None
+        gitignore = self._probe_gitignore(abs_dir, cached_gitignore)
+        listing = self._list_dir(abs_dir) if force_list or known_mtime != mtime else None
+        return mtime, gitignore, listing
+
+    def _walk_item(self, rel_dir, force_list):
+        state = self._dirs.get(rel_dir)
+        return (rel_dir, state['mtime'] if state else None, self._gitignores.get(rel_dir), force_list)
+
+    def _is_reachable(self, rel_dir):
+        """True if the snapshot still lists this directory as a visible child of its parent."""
+        if not rel_dir:
+            return True
+        parent, _, name = rel_dir.rpartition('/')
+        state = self._dirs.get(parent)
+        return bool(state) and name in state['dirs'] and name not in state.get('ignored', ())
+
+    def _gitignore_data(self):
+        # Sorted rel_dirs guarantee that parents precede their children (top-down order)
+        return [
+            (self._abs_dir(rel_dir).replace('\\', '/'), patterns)
+            for rel_dir, (_, patterns) in sorted(self._gitignores.items())
+            if patterns
+        ]
+
+    def _ignored_children(self, prefix, dir_names):
+        """
+        Returns the names of subdirectories excluded by the currently known .gitignore files.
+        Directories holding tracked files are never collapsed, as git keeps tracking their files.
+        """
+        if not dir_names or not self._gitignores:
+            return set()
+        if self._rules is None:
+            self._rules = GitignoreRuleSet(self._gitignore_data())
+        base = self._base_prefix + prefix
+        tracked_dirs = self._git_index.tracked_dirs if self._git_index else ()
+        return {
+            name for name in dir_names
+            if prefix + name not in tracked_dirs and self._rules.is_ignored(base + name, is_dir=True)
+        }
+
+    def _refresh_git_index(self):
+        """Picks up a rewritten .git/index. Returns True if the set of tracked files changed."""
+        index = get_git_index(self.base_dir)
+        previous = self._git_index
+        if index is previous:
+            return False
+        self._git_index = index
+        if index is None or previous is None:
+            return True
+        # git rewrites the index on every status refresh; only the tracked paths matter here
+        return index.paths != previous.paths
+
+    def _drop_subtree(self, rel_dir, removed):
+        """Forgets a directory and all of its descendants, recording their files as removed."""
+        prefix = f"{rel_dir}/"
+        gitignores_changed = False
+        for d in [d for d in self._dirs if d == rel_dir or d.startswith(prefix)]:
+            state = self._dirs.pop(d)
+            d_prefix = f"{d}/" if d else ""
+            removed.extend(d_prefix + name for name in state['files'])
+            if self._gitignores.pop(d, None) is not None:
+                self._rules = None
+                gitignores_changed = True
+        return gitignores_changed
+
+    def scan(self, cancel_event=None, only_dirs=None, progress=None):
+        """
+        Walks the directory snapshot, re-listing only directories whose mtime changed.
+        If 'only_dirs' (a set of relative dirs reported by a change watcher) is given, just
+        those directories are re-listed, and the walk only descends into subdirectories that are new.
+        Returns a delta dict: { 'added': [rel_paths], 'removed': [rel_paths], 'ignored_dirs': [rel_dirs],
+                                'gitignores_changed': bool, 'full': bool }
+        Files that disappear into a newly ignored directory are reported as removed.
+        'progress' (a ScanProgress) is notified for every visited directory.
+        Returns None when cancelled; the snapshot is then discarded so the next scan starts clean.
+        """
+        if only_dirs is not None and not self._dirs:
+            only_dirs = None
+
+        is_full = not self._dirs
+        is_partial = only_dirs is not None
+        added = []
+        removed = []
+        changed = {'gitignores': False}
+        seen_dirs = set()
+
+        # Tracked files change ignore verdicts just like a .gitignore edit does
+        if self._refresh_git_index() and not is_full:
+            changed['gitignores'] = True
+
+        def _apply(item, fetched):
+            rel_dir = item[0]
+            if rel_dir in seen_dirs:
+                return []
+            if fetched is None or not self._is_reachable(rel_dir):
+                # Gone from disk, or dropped while this result was in flight
+                if is_partial and self._drop_subtree(rel_dir, removed):
+                    changed['gitignores'] = True
+                return []
+
+            mtime, gitignore, listing = fetched
+            seen_dirs.add(rel_dir)
+            if self._store_gitignore(rel_dir, gitignore):
+                changed['gitignores'] = True
+
+            prefix = f"{rel_dir}/" if rel_dir else ""
+            state = self._dirs.get(rel_dir)
+            if listing is not None:
+                files, dirs = listing
+                old_files = set(state['files']) if state else set()
+                new_files = set(files)
+                added.extend(prefix + name for name in files if name not in old_files)
+                removed.extend(prefix + name for name in old_files - new_files)
+                if is_partial and state:
+                    for gone in set(state['dirs']) - set(dirs):
+                        if self._drop_subtree(prefix + gone, removed):
+                            changed['gitignores'] = True
+                state = {'mtime': mtime, 'files': files, 'dirs': dirs}
+                self._dirs[rel_dir] = state
+
+            if progress:
+                progress.visit(rel_dir, len(state['files']))
 
-    _walk(base_dir, "")
+            # Re-evaluated on every visit because a parent .gitignore may have changed
+            state['ignored'] = self._ignored_children(prefix, state['dirs'])
+            children = []
+            for name in state['dirs']:
+                child = prefix + name
+                if name in state['ignored']:
+                    if child in self._dirs and self._drop_subtree(child, removed):
+                        changed['gitignores'] = True
+                    continue
+                if not is_partial or child not in self._dirs:
+                    children.append(self._walk_item(child, False))
+            return children
+
+        # Watcher-reported directories are always re-listed; mtime granularity can hide rapid changes
+        roots = [self._walk_item(d, True) for d in sorted(only_dirs, reverse=True)] if is_partial else [self._walk_item("", False)]
+        completed = run_directory_walk(roots, self._fetch_dir, _apply, self.workers, cancel_event)
+        if not completed:
+            self.reset()
+            return None
+        gitignores_changed = changed['gitignores']
+
+        if not is_partial:
+            # Directories that were not reached anymore have been deleted or moved
+            for rel_dir in [d for d in self._dirs if d not in seen_dirs]:
+                state = self._dirs.pop(rel_dir)
+                prefix = f"{rel_dir}/" if rel_dir else ""
+                removed.extend(prefix + name for name in state['files'])
+                if self._gitignores.pop(rel_dir, None) is not None:
+                    self._rules = None
+                    gitignores_changed = True
+
+        if is_partial and gitignores_changed:
+            # Rules of a re-listed directory may (un)ignore directories far below it
+            follow_up = self.scan(cancel_event=cancel_event, progress=progress)
+            if follow_up is None:
+                return None
+            added.extend(follow_up['added'])
+            removed.extend(follow_up['removed'])
+
+        # Parallel walks complete in arbitrary order; keep deltas deterministic
+        added.sort()
+        removed.sort()
+
+        return {
+            'added': added,
+            'removed': removed,
+            'ignored_dirs': self.get_ignored_dirs(),
+            'gitignores_changed': gitignores_changed,
+            'full': is_full
+        }
+
+    def get_directories(self):
+        """Returns the relative paths of all directories in the snapshot."""
+        return list(self._dirs)
+
+    def export_state(self):
+        """Returns a JSON-serializable copy of the snapshot for persisting between sessions."""
+        return {
+            'dirs': {
+                rel_dir: [state['mtime'], state['files'], state['dirs'], sorted(state.get('ignored', ()))]
+                for rel_dir, state in list(self._dirs.items())
+            },
+            'gitignores': {rel_dir: [mtime, patterns] for rel_dir, (mtime, patterns) in list(self._gitignores.items())}
+        }
+
+    def import_state(self, exported):
+        """Restores a snapshot produced by export_state(). The next scan() validates it against the disk."""
+        self.reset()
+        self._dirs = {
+            rel_dir: {'mtime': mtime, 'files': files, 'dirs': dirs, 'ignored': set(ignored)}
+            for rel_dir, (mtime, files, dirs, ignored) in exported['dirs'].items()
+        }
+        self._gitignores = {rel_dir: (mtime, patterns) for rel_dir, (mtime, patterns) in exported['gitignores'].items()}
 
-    return {
-        'files': file_list,
-        'gitignores': gitignore_data
-    }
+    def get_ignored_dirs(self):
+        """Returns the sorted relative paths of collapsed (gitignored) directories."""
+        ignored = []
+        for rel_dir, state in self._dirs.items():
+            prefix = f"{rel_dir}/" if rel_dir else ""
+            ignored.extend(prefix + name for name in state.get('ignored', ()))
+        ignored.sort()
+        return ignored
 
-def get_all_matching_files(base_dir, file_extensions, gitignore_patterns=None, always_include_paths=None, cancel_event=None):
+    def get_raw_inventory(self):
+        """Returns the current snapshot in the raw inventory format used by enrich_inventory."""
+        file_list = []
+        for rel_dir, state in self._dirs.items():
+            prefix = f"{rel_dir}/" if rel_dir else ""
+            file_list.extend(prefix + name for name in state['files'])
+
+        return {
+            'files': file_list,
+            'gitignores': self._gitignore_data(),
+            'ignored_dirs': self.get_ignored_dirs()
+        }
+
+def get_scan_worker_count(config=None):
+    """Reads the walker thread count from the app config (1 means sequential)."""
+    if config is None:
+        from ..core.utils import load_config
+        config = load_config()
+    try:
+        workers = int(config.get('scan_worker_threads', c.SCAN_WORKER_THREADS_DEFAULT))
+    except (TypeError, ValueError):
+        workers = c.SCAN_WORKER_THREADS_DEFAULT
+    return max(1, min(workers, c.SCAN_WORKER_THREADS_MAX))
+
+def get_project_inventory(base_dir, cancel_event=None, workers=None):
     """
-    Scans the file system and returns a flat list of all matching file paths,
+    Performs a raw disk walk and returns a complete inventory of the project.
+    Returns a dict: { 'files': [rel_paths], 'gitignores': [(abs_root, [patterns])], 'ignored_dirs': [rel_dirs] }
+    This inventory is used as the raw source for tree building.
+    """
+    # Gitignored directories are collapsed into 'ignored_dirs'; all other files are stored.
+    # Remaining gitignore and Extension filtering happens during Trie building in the API.
+    if workers is None:
+        workers = get_scan_worker_count()
+    scanner = IncrementalInventoryScanner(base_dir, workers=workers)
+    scanner.scan(cancel_event=cancel_event)
+    return scanner.get_raw_inventory()
+
+def get_all_matching_files(base_dir, file_extensions, gitignore_patterns=None, always_include_paths=None, cancel_event=None, workers=None):
+    """
+    Scans the file system and returns a sorted flat list of all matching file paths,
     respecting .gitignore. Integrated single-pass scan eliminates redundant traversal overhead.
 
     Args:
@@ -96,32 +468,33 @@ def get_all_matching_files(base_dir, file_extensions, gitignore_patterns=None, a
         gitignore_patterns (list, optional): Pre-parsed patterns. If None, discovers automatically.
         always_include_paths (set, optional): Set of relative paths to explicitly check.
         cancel_event (threading.Event, optional): Event to signal scan interruption.
+        workers (int, optional): Directories listed concurrently. If None, read from the app config.
     """
     extensions = {ext for ext in file_extensions if ext.startswith('.')}
     exact_filenames = {ext for ext in file_extensions if not ext.startswith('.')}
     matching_files = []
     base_dir_norm = os.path.abspath(base_dir).replace('\\', '/')
+    if workers is None:
+        workers = get_scan_worker_count()
 
-    def _scan_dir(current_path, current_rel_path, active_patterns):
+    def _scan_dir(item):
+        """Lists one directory. Returns (matching rel_paths, child items) and runs on walker threads."""
+        current_path, current_rel_path, active_patterns = item
+        found = []
+        children = []
         if cancel_event and cancel_event.is_set():
-            return
+            return found, children
 
         # Check for local gitignore to append to stack
-        gitignore_path = os.path.join(current_path, '.gitignore')
         new_active_patterns = active_patterns
-        if os.path.isfile(gitignore_path):
-            try:
-                with open(gitignore_path, 'r', encoding='utf-8-sig') as f:
-                    lines = [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
-                    if lines:
-                        new_active_patterns = active_patterns + [(current_path.replace('\\', '/'), lines)]
-            except (IOError, OSError):
-                pass
+        lines = _read_gitignore_patterns(current_path)
+        if lines:
+            new_active_patterns = active_patterns + [(current_path.replace('\\', '/'), lines)]
 
         try:
             for entry in os.scandir(current_path):
                 if cancel_event and cancel_event.is_set():
-                    return
+                    break
 
                 name_lower = entry.name.lower()
                 if name_lower in c.SPECIAL_FILES_TO_IGNORE or name_lower.startswith(c.CODEMERGER_TEMP_PREFIX):
@@ -133,16 +506,22 @@ def get_all_matching_files(base_dir, file_extensions, gitignore_patterns=None, a
                 rel_path = f"{current_rel_path}/{entry.name}" if current_rel_path else entry.name
 
                 if entry.is_dir():
-                    _scan_dir(entry.path, rel_path, new_active_patterns)
+                    children.append((entry.path, rel_path, new_active_patterns))
                 elif entry.is_file():
                     file_ext = os.path.splitext(name_lower)[1]
                     if file_ext in extensions or name_lower in exact_filenames:
-                        matching_files.append(rel_path)
+                        found.append(rel_path)
         except OSError:
             pass
+        return found, children
+
+    def _collect(item, result):
+        found, children = result
+        matching_files.extend(found)
+        return children
 
     initial_patterns = gitignore_patterns if gitignore_patterns is not None else []
-    _scan_dir(base_dir, "", initial_patterns)
+    run_directory_walk([(base_dir, "", initial_patterns)], _scan_dir, _collect, workers, cancel_event)
 
     if cancel_event and cancel_event.is_set():
         return matching_files
@@ -158,4 +537,6 @@ def get_all_matching_files(base_dir, file_extensions, gitignore_patterns=None, a
             if os.path.isfile(full_path):
                 matching_files.append(normalized_path)
 
-    return matching_files
\ No newline at end of file
+    # Completion order depends on the walker threads; sort for a stable result
+    matching_files.sort()
+    return matching_files
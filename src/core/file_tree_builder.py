@@ -1,11 +1,56 @@
 import os
+import itertools
 from .utils import is_ignored
 from .. import constants as c
 
-def build_file_tree_data(base_dir, file_extensions, gitignore_patterns=None, filter_text="", is_extension_filter_active=True, selected_file_paths=None, is_gitignore_filter_active=True, unknown_files=None, inventory=None):
+def collapsed_selected_rows(base_dir, inventory, paths):
+    """
+    Returns inventory-style rows for the given paths that live inside collapsed ignored
+    directories. Those files are not part of the inventory but may still be selected.
+    """
+    if not inventory.ignored_dirs or not paths:
+        return []
+    collapsed_prefixes = tuple(d + '/' for d in inventory.ignored_dirs)
+    return [
+        (p, os.path.basename(p).lower(), True, os.path.splitext(p.lower())[1])
+        for p in paths
+        if p.startswith(collapsed_prefixes) and os.path.isfile(os.path.join(base_dir, p))
+    ]
+
+def classify_inventory_row(row, filter_text_lower, extensions, exact_filenames, is_extension_filter_active, is_gitignore_filter_active, selected_file_paths):
+    """
+    Applies the file manager's visibility rules to one (rel_path, name_lower, is_ignored, ext) row.
+    Returns None if the file is hidden, otherwise its 'purple' filter reason ('' if not filtered).
+    """
+    rel_path, name_low, file_git_ignored, ext = row
+
+    # Rule: Text Filter is the absolute primary. If it exists, everything must match it.
+    if filter_text_lower and filter_text_lower not in rel_path.lower():
+        return None
+
+    is_valid_ext = ext in extensions or name_low in exact_filenames
+
+    # Rule: If not selected, it must pass secondary settings filters
+    if rel_path not in selected_file_paths:
+        if is_extension_filter_active and not is_valid_ext:
+            return None
+        # USE PRE-CALCULATED FLAG from background enrichment
+        if is_gitignore_filter_active and file_git_ignored:
+            return None
+        return ''
+
+    # Logic for "Purple" Metadata (Selected but hidden by settings)
+    if file_git_ignored:
+        return 'Normally hidden by .gitignore'
+    if not is_valid_ext:
+        return 'Normally hidden by filetype settings'
+    return ''
+
+def build_file_tree_data(base_dir, file_extensions, gitignore_patterns=None, filter_text="", is_extension_filter_active=True, selected_file_paths=None, is_gitignore_filter_active=True, unknown_files=None, inventory=None, path_index=None):
     """
     Scans the file system respecting .gitignore and returns a tree data structure.
     Optimized for massive projects by supporting an in-memory 'inventory' cache.
+    'path_index' (a PathIndex matching the inventory) narrows the rows for the text filter.
     """
     extensions = {ext for ext in file_extensions if ext.startswith('.')}
     exact_filenames = {ext for ext in file_extensions if not ext.startswith('.')}
@@ -19,44 +64,35 @@ def build_file_tree_data(base_dir, file_extensions, gitignore_patterns=None, fil
 
     # --- MODE A: BUILD FROM ENRICHED MEMORY INVENTORY (INSTANT) ---
     if inventory:
-        all_items = inventory['files'] # Enriched list of {p, n, i, e}
-        gitignores = inventory['gitignores']
+        # Columnar Inventory; iterating yields (rel_path, name_lower, is_ignored, ext) rows
+        all_rows = inventory
+        if filter_text_lower and path_index is not None:
+            matched_rows = path_index.search(filter_text_lower)
+            if matched_rows is not None:
+                all_rows = matched_rows
+
+        # Selected files inside collapsed ignored directories are not part of the inventory
+        extra_rows = collapsed_selected_rows(base_dir, inventory, selected_file_paths)
+        if extra_rows:
+            all_rows = itertools.chain(all_rows, extra_rows)
 
         # First Pass: Identify visible files
         visible_items = []
-        for item in all_items:
-            rel_path = item['p']
-
-            # Rule: Text Filter is the absolute primary. If it exists, everything must match it.
-            if filter_text_lower and filter_text_lower not in rel_path.lower():
-                continue
-
-            is_selected = rel_path in selected_file_paths
-
-            # Rule: If not selected, it must pass secondary settings filters
-            if not is_selected:
-                # Extension Filter
-                if is_extension_filter_active:
-                    ext = item['e']
-                    name_low = item['n']
-                    if not (ext in extensions or name_low in exact_filenames):
-                        continue
-
-                # Gitignore Filter
-                if is_gitignore_filter_active:
-                    # USE PRE-CALCULATED FLAG from background enrichment
-                    if item['i']:
-                        continue
-
-            visible_items.append(item)
+        for row in all_rows:
+            filter_reason = classify_inventory_row(
+                row, filter_text_lower, extensions, exact_filenames,
+                is_extension_filter_active, is_gitignore_filter_active, selected_file_paths
+            )
+            if filter_reason is not None:
+                visible_items.append((row, filter_reason))
 
         # Second Pass: Construct Trie structure
         root_nodes = []
         path_to_node = {}
 
-        # Inventory 'files' is pre-sorted in FileMonitorThread (alphabetical)
-        for item in visible_items:
-            rel_path = item['p']
+        # Inventory rows are kept in case-folded path order
+        for row, filter_reason in visible_items:
+            rel_path = row[0]
             parts = rel_path.split('/')
             current_level_nodes = root_nodes
             parent_path = ""
@@ -68,23 +104,6 @@ def build_file_tree_data(base_dir, file_extensions, gitignore_patterns=None, fil
                 if part_path not in path_to_node:
                     node_type = 'file' if is_last else 'dir'
 
-                    is_filtered = False
-                    filter_reason = ''
-
-                    # Logic for "Purple" Metadata (Selected but hidden by settings)
-                    if node_type == 'file' and rel_path in selected_file_paths:
-                        file_git_ignored = item['i']
-                        file_ext = item['e']
-                        name_low = item['n']
-                        is_valid_ext = file_ext in extensions or name_low in exact_filenames
-
-                        if file_git_ignored:
-                            is_filtered = True
-                            filter_reason = 'Normally hidden by .gitignore'
-                        elif not is_valid_ext:
-                            is_filtered = True
-                            filter_reason = 'Normally hidden by filetype settings'
-
                     new_node = {
                         'name': part,
                         'path': part_path,
@@ -94,7 +113,7 @@ def build_file_tree_data(base_dir, file_extensions, gitignore_patterns=None, fil
                         new_node['children'] = []
                     else:
                         new_node['is_new'] = part_path in unknown_files
-                        new_node['is_filtered'] = is_filtered
+                        new_node['is_filtered'] = bool(filter_reason)
                         new_node['filter_reason'] = filter_reason
 
                     path_to_node[part_path] = new_node
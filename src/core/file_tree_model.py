@@ -0,0 +1,284 @@
+import bisect
+import threading
+from .file_tree_builder import build_file_tree_data, classify_inventory_row, collapsed_selected_rows
+from .tree_cache import tree_cache_key
+from .. import constants as c
+
+def _sort_key(node):
+    # Folders first, then case-insensitive name; the same order build_file_tree_data produces
+    return (node['type'] != 'dir', node['name'].lower())
+
+def _copy_node(node):
+    copy = dict(node)
+    if 'children' in node:
+        copy['children'] = [_copy_node(child) for child in node['children']]
+    return copy
+
+class FileTreeModel:
+    """
+    Long-lived file manager tree, kept in the same node layout as build_file_tree_data.
+    Instead of rebuilding the nested dicts on every request, the model re-evaluates only the
+    paths touched by inventory deltas, selection changes and 'new file' changes, and patches
+    its nodes in place. Each change batch bumps 'version' and yields a list of operations:
+      - {'op': 'add', 'parent': dir_path, 'index': i, 'node': node}
+      - {'op': 'remove', 'parent': dir_path, 'path': path}
+      - {'op': 'update', 'path': path, 'node': {changed file fields}}
+    A parent of '' refers to the root list. Operations must be applied in order.
+    Changing the filters (or losing track of the inventory lineage) rebuilds the model. The
+    state being replaced is handed to 'tree_cache', so toggling a filter back restores it as
+    long as the inventory and selection did not change in between.
+    Trees above LAZY_TREE_FILE_THRESHOLD files are served lazily instead: only expanded
+    folders carry 'children', collapsed ones carry 'children': None plus their counts.
+    """
+    def __init__(self, tree_cache=None):
+        self._lock = threading.Lock()
+        self._tree_cache = tree_cache
+        self.version = 0
+        self._roots = []
+        self._nodes = {}
+        self._view = None
+        self._revision = None
+        self._selected = frozenset()
+        self._unknown = frozenset()
+        # dir path ('' for the root) -> [visible files, files counting towards folder completeness]
+        self._counts = {'': [0, 0]}
+
+    def sync(self, since_version, expanded_dirs=None, **view):
+        """
+        Brings the model up to date and returns what the caller is missing:
+          {'version', 'full': True, 'tree': [...]} or {'version', 'base', 'full': False, 'ops': [...]}
+        Callers passing 'expanded_dirs' accept a lazy payload for large trees:
+          {'version', 'full': True, 'lazy': True, 'tree': [...], 'file_count', 'new_files'}
+        'view' holds the arguments of _update().
+        """
+        with self._lock:
+            base_version, ops = self._update(**view)
+            if expanded_dirs is not None and self._counts[''][0] > c.LAZY_TREE_FILE_THRESHOLD:
+                return {
+                    'version': self.version,
+                    'full': True,
+                    'lazy': True,
+                    'tree': self._lazy_nodes(self._roots, set(expanded_dirs)),
+                    'file_count': self._counts[''][0],
+                    'new_files': sorted(p for p in self._unknown if p in self._nodes)
+                }
+            if ops is None or since_version != base_version:
+                return {'version': self.version, 'full': True, 'tree': [_copy_node(n) for n in self._roots]}
+            return {'version': self.version, 'base': base_version, 'full': False, 'ops': ops}
+
+    def children(self, dir_path, expanded_dirs=(), **view):
+        """Returns the lazy child nodes of a folder, with its expanded descendants filled in."""
+        with self._lock:
+            self._update(**view)
+            node = self._nodes.get(dir_path) if dir_path else None
+            if dir_path and (node is None or node['type'] != 'dir'):
+                return []
+            return self._lazy_nodes(node['children'] if node else self._roots, set(expanded_dirs))
+
+    def files_under(self, dir_path, **view):
+        """Returns the paths of all visible files below a folder ('' for the whole tree)."""
+        with self._lock:
+            self._update(**view)
+            node = self._nodes.get(dir_path) if dir_path else None
+            if dir_path and node is None:
+                return []
+            paths = []
+            stack = list(node['children'] if node else self._roots)
+            while stack:
+                n = stack.pop()
+                if n['type'] == 'file':
+                    paths.append(n['path'])
+                else:
+                    stack.extend(n['children'])
+            return sorted(paths)
+
+    def _update(self, base_dir, inventory, file_extensions, filter_text, is_ext_filter, is_git_filter, selected_paths, unknown_files, get_changes, path_index=None):
+        """
+        Brings the model up to date with the inventory, filters and selection.
+        'get_changes(from_revision, to_revision)' returns the paths touched between two inventory
+        revisions, or None if they are not linked by recorded deltas. 'path_index' speeds up rebuilds.
+        Returns a tuple: (version before the update, list of ops), with None ops after a rebuild.
+        """
+        view = (filter_text.lower(), bool(is_ext_filter), bool(is_git_filter), frozenset(file_extensions))
+        selected = frozenset(selected_paths)
+        unknown = frozenset(unknown_files)
+
+        touched = None
+        if view == self._view and self._revision is not None:
+            touched = set() if inventory.revision == self._revision else get_changes(self._revision, inventory.revision)
+        if touched is None:
+            base_version = self.version
+            self._rebuild(base_dir, inventory, view, selected, unknown, path_index)
+            return base_version, None
+
+        touched.update(selected ^ self._selected)
+        touched.update(unknown ^ self._unknown)
+        self._revision = inventory.revision
+        self._selected = selected
+        self._unknown = unknown
+
+        base_version = self.version
+        ops = self._apply(base_dir, inventory, touched) if touched else []
+        if ops:
+            self.version += 1
+        return base_version, ops
+
+    def _lazy_nodes(self, nodes, expanded_dirs):
+        result = []
+        for node in nodes:
+            copy = dict(node)
+            if node['type'] == 'dir':
+                if node['path'] in expanded_dirs:
+                    copy['children'] = self._lazy_nodes(node['children'], expanded_dirs)
+                else:
+                    copy['children'] = None
+                    copy['child_count'] = len(node['children'])
+                    copy['file_count'], copy['relevant_count'] = self._counts[node['path']]
+            result.append(copy)
+        return result
+
+    def _cache_key(self):
+        filter_text, is_ext_filter, is_git_filter, file_extensions = self._view
+        return ('model',) + tree_cache_key(self._revision, file_extensions, filter_text, is_ext_filter, is_git_filter, self._selected, self._unknown)
+
+    def _rebuild(self, base_dir, inventory, view, selected, unknown, path_index):
+        if self._tree_cache is not None and self._view is not None:
+            # The model owns its nodes and patches them, so states move in and out of the cache
+            self._tree_cache.put(self._cache_key(), (self._roots, self._nodes, self._counts), len(self._nodes))
+
+        self._view = view
+        self._revision = inventory.revision
+        self._selected = selected
+        self._unknown = unknown
+        self.version += 1
+
+        cached = self._tree_cache.take(self._cache_key()) if self._tree_cache is not None else None
+        if cached is not None:
+            self._roots, self._nodes, self._counts = cached
+            return
+
+        self._nodes = {}
+        filter_text, is_ext_filter, is_git_filter, file_extensions = view
+        self._roots = build_file_tree_data(
+            base_dir, file_extensions, filter_text=filter_text, is_extension_filter_active=is_ext_filter,
+            selected_file_paths=selected, is_gitignore_filter_active=is_git_filter,
+            unknown_files=unknown, inventory=inventory, path_index=path_index
+        )
+        self._counts = {'': [0, 0]}
+        stack = list(self._roots)
+        while stack:
+            node = stack.pop()
+            self._nodes[node['path']] = node
+            if 'children' in node:
+                self._counts[node['path']] = [0, 0]
+                stack.extend(node['children'])
+        for path, node in self._nodes.items():
+            if node['type'] == 'file':
+                self._count_file(path, 1)
+
+    def _file_fields(self, rel_path, filter_reason):
+        return {'is_new': rel_path in self._unknown, 'is_filtered': bool(filter_reason), 'filter_reason': filter_reason}
+
+    def _apply(self, base_dir, inventory, touched):
+        filter_text_lower, is_ext_filter, is_git_filter, file_extensions = self._view
+        extensions = {ext for ext in file_extensions if ext.startswith('.')}
+        exact_filenames = {ext for ext in file_extensions if not ext.startswith('.')}
+
+        missing = []
+        rows = []
+        for rel_path in touched:
+            row = inventory.row(rel_path)
+            if row is None:
+                missing.append(rel_path)
+            else:
+                rows.append(row)
+        extra_rows = collapsed_selected_rows(base_dir, inventory, [p for p in missing if p in self._selected])
+        rows.extend(extra_rows)
+        found = {row[0] for row in extra_rows}
+
+        ops = []
+        created = set()
+        for rel_path in sorted(missing, key=str.lower):
+            if rel_path not in found:
+                self._drop_file(rel_path, ops, created)
+        for row in sorted(rows, key=lambda r: r[0].lower()):
+            filter_reason = classify_inventory_row(row, filter_text_lower, extensions, exact_filenames, is_ext_filter, is_git_filter, self._selected)
+            if filter_reason is None:
+                self._drop_file(row[0], ops, created)
+            else:
+                self._put_file(row[0], self._file_fields(row[0], filter_reason), ops, created)
+
+        # Added subtrees are copied once all of this batch's changes have landed in them
+        for op in ops:
+            if op['op'] == 'add':
+                op['node'] = _copy_node(op['node'])
+        return ops
+
+    def _count_file(self, rel_path, delta):
+        relevant = 0 if rel_path.rpartition('/')[2] in c.FILES_TO_IGNORE_FOR_VISUAL_COMPLETENESS else delta
+        rel_dir = rel_path
+        while rel_dir:
+            rel_dir = rel_dir.rpartition('/')[0]
+            counts = self._counts[rel_dir]
+            counts[0] += delta
+            counts[1] += relevant
+
+    def _siblings(self, parent_path):
+        return self._nodes[parent_path]['children'] if parent_path else self._roots
+
+    def _put_file(self, rel_path, fields, ops, created):
+        """Adds or updates a visible file, creating its parent folders."""
+        node = self._nodes.get(rel_path)
+        if node is not None:
+            changed = {k: v for k, v in fields.items() if node[k] != v}
+            if changed:
+                node.update(changed)
+                if rel_path.rpartition('/')[0] not in created:
+                    ops.append({'op': 'update', 'path': rel_path, 'node': changed})
+            return
+
+        parts = rel_path.split('/')
+        parent_path = ''
+        for i, part in enumerate(parts):
+            part_path = f"{parent_path}/{part}" if parent_path else part
+            if part_path not in self._nodes:
+                node = {'name': part, 'path': part_path, 'type': 'file' if i == len(parts) - 1 else 'dir'}
+                if node['type'] == 'dir':
+                    node['children'] = []
+                    self._counts[part_path] = [0, 0]
+                else:
+                    node.update(fields)
+                siblings = self._siblings(parent_path)
+                index = bisect.bisect_left(siblings, _sort_key(node), key=_sort_key)
+                siblings.insert(index, node)
+                self._nodes[part_path] = node
+                # Only the topmost new node is reported; its copy carries everything below it
+                if parent_path not in created:
+                    ops.append({'op': 'add', 'parent': parent_path, 'index': index, 'node': node})
+                created.add(part_path)
+            parent_path = part_path
+        self._count_file(rel_path, 1)
+
+    def _drop_file(self, rel_path, ops, created):
+        """Removes a file if it is shown, pruning folders that become empty."""
+        node = self._nodes.get(rel_path)
+        if node is None or node['type'] != 'file':
+            return
+        self._count_file(rel_path, -1)
+        path = rel_path
+        while True:
+            parent_path = path.rpartition('/')[0]
+            siblings = self._siblings(parent_path)
+            index = bisect.bisect_left(siblings, _sort_key(node), key=_sort_key)
+            while siblings[index] is not node:
+                index += 1
+            del siblings[index]
+            del self._nodes[path]
+            self._counts.pop(path, None)
+            if parent_path not in created:
+                ops.append({'op': 'remove', 'parent': parent_path, 'path': path})
+            created.discard(path)
+            if not parent_path or self._nodes[parent_path]['children']:
+                return
+            path = parent_path
+            node = self._nodes[path]
@@ -0,0 +1,196 @@
+import re
+import heapq
+import operator
+import threading
+from itertools import repeat
+from .. import constants as c
+
+# Scoring, loosely after fzf: every matched character scores, boundaries and runs earn bonuses
+_SCORE_MATCH = 16
+_BONUS_BOUNDARY = 8
+_BONUS_CONSECUTIVE = 4
+_BONUS_BASENAME = 6
+_PENALTY_GAP = 1
+_MAX_GAP_PENALTY = 12
+_BOUNDARY_CHARS = '/_-. '
+
+_BIT_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+
+def _flags_to_bitset(flags):
+    """Packs a bytes object of 0/1 flags into an int whose bit i is flags[i]."""
+    return int(flags[::-1].translate(_BIT_DIGITS) or b'0', 2)
+
+def _iter_bits(bitset):
+    """Yields the indexes of the set bits, lowest first."""
+    digits = bin(bitset)[:1:-1]
+    i = digits.find('1')
+    while i != -1:
+        yield i
+        i = digits.find('1', i + 1)
+
+class FuzzyFinder:
+    """
+    Ranks the non-ignored paths of the inventory by fuzzy subsequence score.
+    Fast rejection uses character bitsets: for every character a big int with bit i set when
+    path i contains it (the per-path character masks, stored transposed so that a query costs
+    a few C-level ANDs instead of a Python loop over all paths). Separate bitsets over the
+    file names let basename matches be scored first. Scoring runs in Python, so at most
+    FUZZY_FINDER_MAX_CANDIDATES candidates are scored per query.
+    Path ids are never reused; removed paths leave a hole until the finder is rebuilt.
+    'revision' is the Inventory revision the finder reflects.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.revision = None
+        self._paths = []
+        self._lower = []
+        self._name_starts = []
+        self._ids = {}
+        self._dead_count = 0
+        self._path_bits = {}
+        self._name_bits = {}
+        self._name_start_bits = {}
+
+    @classmethod
+    def build(cls, inventory):
+        finder = cls()
+        for rel_path, _, is_ignored, _ in inventory:
+            if not is_ignored:
+                finder._append(rel_path)
+
+        # One C-level pass over all paths per character; no per-path Python loop
+        texts = finder._lower
+        names = [t[i:] for t, i in zip(texts, finder._name_starts)]
+        first_chars = [n[:1] for n in names]
+        for char in set(''.join(texts)):
+            finder._path_bits[char] = _flags_to_bitset(bytes(map(operator.contains, texts, repeat(char))))
+            finder._name_bits[char] = _flags_to_bitset(bytes(map(operator.contains, names, repeat(char))))
+            finder._name_start_bits[char] = _flags_to_bitset(bytes(map(operator.eq, first_chars, repeat(char))))
+        finder.revision = inventory.revision
+        return finder
+
+    @property
+    def fragmented(self):
+        """True once more ids belong to removed paths than to live ones."""
+        return self._dead_count > len(self._ids)
+
+    def _append(self, rel_path):
+        i = len(self._paths)
+        text = rel_path.lower()
+        self._paths.append(rel_path)
+        self._lower.append(text)
+        self._name_starts.append(text.rfind('/') + 1)
+        self._ids[rel_path] = i
+        return i
+
+    def apply(self, inventory, touched_paths):
+        """Catches the finder up with an inventory derived from its revision through 'touched_paths'."""
+        with self._lock:
+            for rel_path in touched_paths:
+                row = inventory.row(rel_path)
+                visible = row is not None and not row[2]
+                i = self._ids.get(rel_path)
+                if visible and i is None:
+                    self._set_bits(self._append(rel_path), True)
+                elif not visible and i is not None:
+                    self._set_bits(i, False)
+                    del self._ids[rel_path]
+                    self._paths[i] = self._lower[i] = None
+                    self._dead_count += 1
+            self.revision = inventory.revision
+
+    def _set_bits(self, i, on):
+        text = self._lower[i]
+        name = text[self._name_starts[i]:]
+        bit = 1 << i
+        targets = [(self._path_bits, char) for char in set(text)]
+        targets += [(self._name_bits, char) for char in set(name)]
+        if name:
+            targets.append((self._name_start_bits, name[0]))
+        for bits_by_char, char in targets:
+            bits = bits_by_char.get(char, 0)
+            bits_by_char[char] = bits | bit if on else bits & ~bit
+
+    def _candidates(self, bits_by_char, chars):
+        bits = -1
+        for char in chars:
+            bits &= bits_by_char.get(char, 0)
+            if not bits:
+                return 0
+        return bits
+
+    def search(self, query, limit=c.FUZZY_FINDER_MAX_RESULTS):
+        """
+        Returns up to 'limit' matches, best first, as dicts:
+        {'path': rel_path, 'score': int, 'positions': [matched character indexes]}
+        Whitespace in the query is ignored and matching is case-insensitive.
+        """
+        query = ''.join(query.lower().split())
+        if not query:
+            return []
+        chars = set(query)
+        pattern = re.compile('.*?'.join(f'({re.escape(ch)})' for ch in query))
+
+        with self._lock:
+            path_bits = self._candidates(self._path_bits, chars)
+            if not path_bits:
+                return []
+            name_bits = self._candidates(self._name_bits, chars) & path_bits
+            name_start_bits = self._name_start_bits.get(query[0], 0) & name_bits
+
+            # Likely winners get the scoring budget first: names starting with the query's first
+            # character, then other names holding every character, then the remaining paths
+            budget = c.FUZZY_FINDER_MAX_CANDIDATES
+            scored = []
+            for bits in (name_start_bits, name_bits & ~name_start_bits, path_bits & ~name_bits):
+                for i in _iter_bits(bits):
+                    if budget <= 0:
+                        break
+                    budget -= 1
+                    match = self._score(i, query, pattern)
+                    if match:
+                        scored.append(match)
+
+            best = heapq.nlargest(limit, scored, key=lambda m: (m[0], -len(self._paths[m[1]])))
+            return [{'path': self._paths[i], 'score': score, 'positions': positions} for score, i, positions in best]
+
+    def _score(self, i, query, pattern):
+        text = self._lower[i]
+        name_start = self._name_starts[i]
+        # Prefer a match that lies entirely within the file name
+        match = pattern.search(text, name_start) or pattern.search(text)
+        if not match:
+            return None
+
+        # Walk back from the end of the forward match to find the tightest window, then rematch
+        end = match.end()
+        q = len(query) - 1
+        start = end - 1
+        while start >= match.start():
+            if text[start] == query[q]:
+                q -= 1
+                if q < 0:
+                    break
+            start -= 1
+        if start > match.start():
+            match = pattern.match(text, start) or match
+
+        positions = [match.start(g) for g in range(1, len(query) + 1)]
+        original = self._paths[i]
+        # Lowercasing a few non-ASCII characters changes the length; skip camelCase detection there
+        check_case = len(original) == len(text)
+        score = 0
+        previous = None
+        for pos in positions:
+            score += _SCORE_MATCH
+            if pos == 0 or text[pos - 1] in _BOUNDARY_CHARS or (check_case and original[pos].isupper() and original[pos - 1].islower()):
+                score += _BONUS_BOUNDARY
+            if pos >= name_start:
+                score += _BONUS_BASENAME
+            if previous is not None:
+                if pos == previous + 1:
+                    score += _BONUS_CONSECUTIVE
+                else:
+                    score -= min(pos - previous - 1, _MAX_GAP_PENALTY) * _PENALTY_GAP
+            previous = pos
+        return score, i, positions
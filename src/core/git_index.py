@@ -0,0 +1,160 @@
+import os
+import struct
+import logging
+import threading
+
+log = logging.getLogger("CodeMerger")
+
+_HEADER = struct.Struct('>4sII')
+# ctime s/ns, mtime s/ns, dev, ino, mode, uid, gid, size
+_ENTRY_STAT = struct.Struct('>10I')
+_EXTENDED_FLAG = 0x4000
+_SPARSE_DIR_MODE = 0o040000
+
+class GitIndex:
+    """
+    Tracked files of a repository, parsed from .git/index (the DIRC format).
+    'paths' is the set of tracked file paths.
+    'tracked_dirs' holds every directory that contains at least one tracked file.
+    """
+    def __init__(self, paths):
+        self.paths = paths
+        self.tracked_dirs = set()
+        for path in paths:
+            rel_dir = path.rpartition('/')[0]
+            while rel_dir and rel_dir not in self.tracked_dirs:
+                self.tracked_dirs.add(rel_dir)
+                rel_dir = rel_dir.rpartition('/')[0]
+
+    def __contains__(self, rel_path):
+        return rel_path in self.paths
+
+def _resolve_git_dir(base_dir):
+    """Returns the git directory of a repository root, following 'gitdir:' files (worktrees, submodules)."""
+    dot_git = os.path.join(base_dir, '.git')
+    if os.path.isdir(dot_git):
+        return dot_git
+    if not os.path.isfile(dot_git):
+        return None
+    try:
+        with open(dot_git, 'r', encoding='utf-8') as f:
+            line = f.readline().strip()
+    except OSError:
+        return None
+    if not line.startswith('gitdir:'):
+        return None
+    git_dir = line[len('gitdir:'):].strip()
+    return git_dir if os.path.isabs(git_dir) else os.path.normpath(os.path.join(base_dir, git_dir))
+
+def _hash_size(git_dir):
+    """SHA-256 repositories store 32-byte object ids in the index instead of 20."""
+    try:
+        with open(os.path.join(git_dir, 'config'), 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                key, _, value = line.partition('=')
+                if key.strip().lower() == 'objectformat' and value.strip().lower() == 'sha256':
+                    return 32
+    except OSError:
+        pass
+    return 20
+
+def _read_varint(data, offset):
+    """Decodes the offset varint used by index v4 path prefix compression."""
+    byte = data[offset]
+    offset += 1
+    value = byte & 0x7f
+    while byte & 0x80:
+        byte = data[offset]
+        offset += 1
+        value = ((value + 1) << 7) | (byte & 0x7f)
+    return value, offset
+
+def parse_git_index(data, hash_size=20):
+    """
+    Parses the raw bytes of a .git/index file (versions 2-4).
+    Returns the frozenset of tracked paths, or None for layouts whose entry list
+    is not a complete file listing (split index, sparse directory entries).
+    """
+    if len(data) < _HEADER.size:
+        return None
+    signature, version, count = _HEADER.unpack_from(data, 0)
+    if signature != b'DIRC' or version not in (2, 3, 4):
+        return None
+
+    paths = set()
+    offset = _HEADER.size
+    previous_path = b''
+    fixed_size = _ENTRY_STAT.size + hash_size + 2
+
+    for _ in range(count):
+        entry_start = offset
+        fields = _ENTRY_STAT.unpack_from(data, offset)
+        offset += _ENTRY_STAT.size + hash_size
+        flags = struct.unpack_from('>H', data, offset)[0]
+        offset += 2
+        header_size = fixed_size
+        if version >= 3 and flags & _EXTENDED_FLAG:
+            offset += 2
+            header_size += 2
+
+        if version == 4:
+            strip, offset = _read_varint(data, offset)
+            end = data.index(b'\0', offset)
+            path = previous_path[:len(previous_path) - strip] + data[offset:end]
+            offset = end + 1
+        else:
+            end = data.index(b'\0', offset)
+            path = data[offset:end]
+            # Entries are NUL-padded to a multiple of 8 bytes
+            offset = entry_start + ((header_size + len(path) + 8) // 8) * 8
+        previous_path = path
+
+        if fields[6] == _SPARSE_DIR_MODE:
+            return None
+        paths.add(path.decode('utf-8', 'surrogateescape'))
+
+    # Extensions follow the entries; a split index keeps most entries in a shared file
+    while offset + 8 <= len(data) - hash_size:
+        signature, size = struct.unpack_from('>4sI', data, offset)
+        if signature in (b'link', b'sdir'):
+            return None
+        offset += 8 + size
+
+    return frozenset(paths)
+
+# abs git dir -> ((index mtime_ns, size), GitIndex)
+_index_cache = {}
+_index_cache_lock = threading.Lock()
+
+def get_git_index(base_dir):
+    """
+    Returns the GitIndex of a project rooted at a git repository, or None if the project
+    is not a repository root or its index cannot be used. Parsed once per index revision.
+    """
+    git_dir = _resolve_git_dir(base_dir)
+    if not git_dir:
+        return None
+    index_path = os.path.join(git_dir, 'index')
+    try:
+        st = os.stat(index_path)
+    except OSError:
+        return None
+    stamp = (st.st_mtime_ns, st.st_size)
+
+    with _index_cache_lock:
+        cached = _index_cache.get(git_dir)
+        if cached and cached[0] == stamp:
+            return cached[1]
+
+    try:
+        with open(index_path, 'rb') as f:
+            data = f.read()
+        paths = parse_git_index(data, _hash_size(git_dir))
+    except (OSError, struct.error, ValueError, IndexError) as e:
+        log.warning(f"Could not parse git index of {base_dir}: {e}")
+        paths = None
+
+    index = GitIndex(paths) if paths is not None else None
+    with _index_cache_lock:
+        _index_cache[git_dir] = (stamp, index)
+    return index
@@ -0,0 +1,249 @@
+import os
+import re
+
+# fnmatch compared paths through os.path.normcase; keep the same case rules per platform
+_REGEX_FLAGS = re.IGNORECASE if os.path.normcase('A') == 'a' else 0
+
+# Verdict memos are cleared wholesale once they grow past these sizes
+_MAX_DIR_MEMO = 50000
+_MAX_RULE_SETS = 64
+_MAX_MATCHERS = 1024
+
+def _glob_to_regex(pattern):
+    """
+    Translates a single gitignore glob into a regex body (no anchors, no capturing groups).
+    '*' and '?' never cross a '/', while '**' spans any number of directories.
+    """
+    out = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        ch = pattern[i]
+        if ch == '*':
+            if pattern.startswith('**', i):
+                at_start = i == 0 or pattern[i - 1] == '/'
+                i += 2
+                if at_start and i < n and pattern[i] == '/':
+                    # '**/' matches zero or more leading directories
+                    out.append('(?:.*/)?')
+                    i += 1
+                else:
+                    out.append('.*')
+                continue
+            out.append('[^/]*')
+        elif ch == '?':
+            out.append('[^/]')
+        elif ch == '[':
+            end = i + 1
+            if end < n and pattern[end] in '!^':
+                end += 1
+            if end < n and pattern[end] == ']':
+                end += 1
+            while end < n and pattern[end] != ']':
+                end += 1
+            if end >= n:
+                out.append('\\[')
+            else:
+                body = pattern[i + 1:end]
+                if body[:1] in ('!', '^'):
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        elif ch == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(ch))
+        i += 1
+    return ''.join(out)
+
+def _combine(rules):
+    """
+    Joins (rule_index, regex_body) pairs into one alternation, highest index first.
+    Returns (compiled_regex, group_to_rule_index) or (None, None) for an empty class.
+    Because the highest index is tried first, a match directly yields the last
+    matching rule of the .gitignore, which is the one that decides the verdict.
+    """
+    if not rules:
+        return None, None
+    group_to_index = [None]
+    alternatives = []
+    for index, body in sorted(rules, reverse=True):
+        alternatives.append(f"({body})")
+        group_to_index.append(index)
+    return re.compile('|'.join(alternatives), _REGEX_FLAGS), group_to_index
+
+def _last_rule(compiled, subject):
+    regex, group_to_index = compiled
+    if regex is None or not subject:
+        return -1
+    m = regex.fullmatch(subject)
+    return group_to_index[m.lastindex] if m else -1
+
+class GitignoreMatcher:
+    """
+    Precompiled representation of a single .gitignore file.
+    Patterns are classified once (negation, anchoring, dir-only) and folded into one
+    combined regex per rule class instead of being re-parsed for every path:
+      - contains: the path lies inside a matching directory (evaluated on the parent dir)
+      - entry:    the path itself matches a regular rule
+      - entry_dir: the path itself matches a dir-only rule (needs an is_dir check)
+    Each class exists twice: for ignoring rules and for negated ('!') rules.
+    Anchoring is encoded in each alternative (anchored rules match from the .gitignore
+    root, floating rules may start at any path component).
+    """
+    def __init__(self, root, patterns):
+        self.root = root.replace('\\', '/').rstrip('/')
+        self.prefix = self.root + '/'
+        self.has_negations = False
+
+        classes = {
+            ('contains', False): [], ('contains', True): [],
+            ('entry', False): [], ('entry', True): [],
+            ('entry_dir', False): [], ('entry_dir', True): []
+        }
+
+        for index, p_orig in enumerate(patterns):
+            p = p_orig.strip()
+            if not p or p.startswith('#'):
+                continue
+
+            is_negated = p.startswith('!')
+            if is_negated:
+                p = p[1:]
+                self.has_negations = True
+
+            is_dir_only = p.endswith('/')
+            p_clean = p.rstrip('/')
+            # A pattern is anchored if it has a slash (other than a trailing one)
+            is_anchored = '/' in p_clean or p_orig.startswith('/')
+            p_final = p_clean.lstrip('/')
+            if not p_final:
+                continue
+
+            body = _glob_to_regex(p_final)
+            lead = '' if is_anchored else '(?:.*/)?'
+
+            classes[('contains', is_negated)].append((index, f"{lead}{body}(?:/.*)?"))
+            entry_class = 'entry_dir' if is_dir_only else 'entry'
+            classes[(entry_class, is_negated)].append((index, f"{lead}{body}"))
+
+        self._contains = (_combine(classes[('contains', False)]), _combine(classes[('contains', True)]))
+        self._entry = (_combine(classes[('entry', False)]), _combine(classes[('entry', True)]))
+        self._entry_dir = (_combine(classes[('entry_dir', False)]), _combine(classes[('entry_dir', True)]))
+        self._has_dir_only = self._entry_dir[0][0] is not None or self._entry_dir[1][0] is not None
+
+        # rel_dir -> (last ignoring rule, last negated rule) among rules matching an ancestor
+        self._dir_memo = {}
+
+    def _dir_verdict(self, rel_dir):
+        cached = self._dir_memo.get(rel_dir)
+        if cached is None:
+            cached = (_last_rule(self._contains[0], rel_dir), _last_rule(self._contains[1], rel_dir))
+            if len(self._dir_memo) >= _MAX_DIR_MEMO:
+                self._dir_memo.clear()
+            self._dir_memo[rel_dir] = cached
+        return cached
+
+    def match(self, rel_path, is_dir=None):
+        """
+        Evaluates a path relative to this .gitignore's directory.
+        Returns True (ignored), False (re-included by a negation) or None (no rule applies).
+        'is_dir' is only resolved from disk when a dir-only rule could change the verdict.
+        """
+        rel_dir = rel_path.rpartition('/')[0]
+        ignore_idx, negate_idx = self._dir_verdict(rel_dir) if rel_dir else (-1, -1)
+        ignore_idx = max(ignore_idx, _last_rule(self._entry[0], rel_path))
+        negate_idx = max(negate_idx, _last_rule(self._entry[1], rel_path))
+
+        if self._has_dir_only:
+            dir_ignore_idx = _last_rule(self._entry_dir[0], rel_path)
+            dir_negate_idx = _last_rule(self._entry_dir[1], rel_path)
+            if dir_ignore_idx > ignore_idx or dir_negate_idx > negate_idx:
+                if is_dir is None:
+                    is_dir = os.path.isdir(self.prefix + rel_path)
+                if is_dir:
+                    ignore_idx = max(ignore_idx, dir_ignore_idx)
+                    negate_idx = max(negate_idx, dir_negate_idx)
+
+        if ignore_idx < 0 and negate_idx < 0:
+            return None
+        return ignore_idx > negate_idx
+
+    def match_many(self, rel_paths, is_dir=None):
+        """Batch variant of match() sharing the per-directory memo across all paths."""
+        return [self.match(rel_path, is_dir) for rel_path in rel_paths]
+
+class GitignoreRuleSet:
+    """
+    The ordered stack of .gitignore files ([(abs_root, [patterns])], top-down) that
+    applies to a project. Later (deeper) files override the verdicts of earlier ones.
+    """
+    def __init__(self, gitignore_data):
+        self.matchers = [get_matcher(root, patterns) for root, patterns in gitignore_data]
+        # parent abs dir -> matchers whose root is an ancestor of it
+        self._applicable_memo = {}
+
+    def _applicable(self, parent_dir):
+        applicable = self._applicable_memo.get(parent_dir)
+        if applicable is None:
+            probe = parent_dir + '/'
+            applicable = [m for m in self.matchers if probe.startswith(m.prefix)]
+            if len(self._applicable_memo) >= _MAX_DIR_MEMO:
+                self._applicable_memo.clear()
+            self._applicable_memo[parent_dir] = applicable
+        return applicable
+
+    def is_ignored(self, path_norm, is_dir=None):
+        """Evaluates a normalized absolute path (forward slashes) against all applicable files."""
+        if '/.git/' in path_norm or path_norm.endswith('/.git'):
+            return True
+
+        verdict = False
+        for matcher in self._applicable(path_norm.rpartition('/')[0]):
+            result = matcher.match(path_norm[len(matcher.prefix):], is_dir)
+            if result is not None:
+                verdict = result
+        return verdict
+
+    def match_many(self, paths, is_dir=None):
+        """Returns the ignore verdicts for a batch of normalized absolute paths."""
+        is_ignored = self.is_ignored
+        return [is_ignored(path, is_dir) for path in paths]
+
+    def has_negations(self):
+        return any(m.has_negations for m in self.matchers)
+
+# (root, tuple(patterns)) -> GitignoreMatcher
+_matcher_cache = {}
+
+def get_matcher(root, patterns):
+    """Returns the compiled matcher for one .gitignore, compiling it only on first use."""
+    key = (root, tuple(patterns))
+    matcher = _matcher_cache.get(key)
+    if matcher is None:
+        matcher = GitignoreMatcher(root, patterns)
+        if len(_matcher_cache) >= _MAX_MATCHERS:
+            _matcher_cache.clear()
+        _matcher_cache[key] = matcher
+    return matcher
+
+# id(gitignore_data) -> (gitignore_data, length at build time, GitignoreRuleSet)
+_rule_set_cache = {}
+
+def get_rule_set(gitignore_data):
+    """
+    Returns the compiled rule set for a gitignore_data list, building it once per list.
+    The list reference is kept in the cache so its id cannot be recycled; the length
+    check covers callers that append to the list while walking (parse_gitignore).
+    """
+    key = id(gitignore_data)
+    cached = _rule_set_cache.get(key)
+    if cached and cached[0] is gitignore_data and cached[1] == len(gitignore_data):
+        return cached[2]
+
+    rule_set = GitignoreRuleSet(gitignore_data)
+    if len(_rule_set_cache) >= _MAX_RULE_SETS:
+        _rule_set_cache.clear()
+    _rule_set_cache[key] = (gitignore_data, len(gitignore_data), rule_set)
+    return rule_set
@@ -0,0 +1,172 @@
+import os
+import sys
+import errno
+import struct
+import select
+import logging
+import ctypes
+import ctypes.util
+
+log = logging.getLogger("CodeMerger")
+
+# inotify constants from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# Structural changes only; content edits are irrelevant to the inventory except for .gitignore
+WATCH_MASK = (
+    IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO |
+    IN_DELETE_SELF | IN_MOVE_SELF | IN_CLOSE_WRITE | IN_ONLYDIR
+)
+
+_EVENT_HEADER = struct.Struct('iIII')
+_READ_BUFFER_SIZE = 64 * 1024
+
+class WatchLimitReached(Exception):
+    """Raised when the kernel refuses new watches (fs.inotify.max_user_watches exhausted)."""
+    pass
+
+class InotifyWatcher:
+    """
+    Thin ctypes wrapper around Linux inotify that maps kernel events back to
+    project-relative directories. Only directories are watched; the caller
+    re-lists the reported directories through the incremental scanner.
+    """
+    def __init__(self):
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._libc.inotify_init1.argtypes = [ctypes.c_int]
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+        self.base_dir = None
+        self._wd_to_dir = {}
+        self._dir_to_wd = {}
+
+    @staticmethod
+    def is_supported():
+        return sys.platform.startswith('linux')
+
+    @property
+    def watch_count(self):
+        return len(self._dir_to_wd)
+
+    def close(self):
+        if self._fd is not None and self._fd >= 0:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+        self._fd = None
+        self._wd_to_dir = {}
+        self._dir_to_wd = {}
+
+    def _add_watch(self, rel_dir):
+        abs_dir = os.path.join(self.base_dir, rel_dir) if rel_dir else self.base_dir
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(abs_dir), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOSPC, errno.ENOMEM):
+                raise WatchLimitReached(f"inotify watch limit reached after {self.watch_count} directories")
+            # Directory vanished between the scan and the watch registration; the next scan will notice
+            return
+        self._wd_to_dir[wd] = rel_dir
+        self._dir_to_wd[rel_dir] = wd
+
+    def _remove_watch(self, rel_dir):
+        wd = self._dir_to_wd.pop(rel_dir, None)
+        if wd is None:
+            return
+        self._wd_to_dir.pop(wd, None)
+        self._libc.inotify_rm_watch(self._fd, wd)
+
+    def sync(self, base_dir, rel_dirs):
+        """
+        Aligns the registered watches with the given set of project directories.
+        Raises WatchLimitReached if the kernel refuses to add more watches.
+        """
+        if base_dir != self.base_dir:
+            for rel_dir in list(self._dir_to_wd):
+                self._remove_watch(rel_dir)
+            self.base_dir = base_dir
+
+        wanted = set(rel_dirs)
+        for rel_dir in [d for d in self._dir_to_wd if d not in wanted]:
+            self._remove_watch(rel_dir)
+        for rel_dir in wanted:
+            if rel_dir not in self._dir_to_wd:
+                self._add_watch(rel_dir)
+
+    def read_events(self, timeout):
+        """
+        Waits up to 'timeout' seconds for events and drains the queue.
+        Returns a tuple: (set of dirty relative dirs, overflowed flag)
+        """
+        dirty = set()
+        overflowed = False
+        if self._fd is None:
+            return dirty, overflowed
+
+        try:
+            readable, _, _ = select.select([self._fd], [], [], timeout)
+        except (OSError, ValueError):
+            return dirty, overflowed
+        if not readable:
+            return dirty, overflowed
+
+        while True:
+            try:
+                data = os.read(self._fd, _READ_BUFFER_SIZE)
+            except BlockingIOError:
+                break
+            except OSError:
+                break
+            if not data:
+                break
+
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                wd, mask, _cookie, name_len = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + name_len].rstrip(b'\0').decode('utf-8', 'surrogateescape')
+                offset += name_len
+
+                if mask & IN_Q_OVERFLOW:
+                    overflowed = True
+                    continue
+
+                rel_dir = self._wd_to_dir.get(wd)
+                if rel_dir is None:
+                    continue
+
+                if mask & IN_IGNORED:
+                    # Kernel dropped the watch (directory deleted or unmounted)
+                    self._wd_to_dir.pop(wd, None)
+                    self._dir_to_wd.pop(rel_dir, None)
+                    continue
+
+                if mask & IN_CLOSE_WRITE and name != '.gitignore':
+                    continue
+
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    parent = rel_dir.rpartition('/')[0]
+                    dirty.add(parent)
+
+                dirty.add(rel_dir)
+
+        return dirty, overflowed
@@ -0,0 +1,233 @@
+import os
+import itertools
+from array import array
+
+# Every inventory object gets a unique, increasing revision number
+_revisions = itertools.count(1)
+
+def _split(rel_path):
+    rel_dir, _, name = rel_path.rpartition('/')
+    return rel_dir, name
+
+class Inventory:
+    """
+    Columnar, immutable snapshot of an enriched project inventory.
+    Instead of one dict per file, rows are stored as parallel columns:
+      - a directory id into an interned table of relative directory paths
+      - the file name
+      - an ignore flag (bytearray)
+      - an extension id into a small table of lowercase extensions
+    Rows are kept in case-folded path order, so tree building and bisecting need no sort.
+    Iterating yields (rel_path, name_lower, is_ignored, ext) tuples; nothing is materialized.
+    """
+    def __init__(self, dirs, dir_ids, names, ignored, exts, ext_ids, gitignores, ignored_dirs):
+        self._dirs = dirs
+        self._dir_ids = dir_ids
+        self._names = names
+        self._ignored = ignored
+        self._exts = exts
+        self._ext_ids = ext_ids
+
+        self.gitignores = gitignores
+        self.ignored_dirs = ignored_dirs
+        # rel_dir -> file count of a collapsed ignored directory, filled lazily
+        self.ignored_counts = {}
+
+        self.revision = next(_revisions)
+        # Set by with_changes(): the revision this one was derived from and the paths it touched
+        self.base_revision = None
+        self.changed_paths = ()
+
+    @classmethod
+    def build(cls, rel_paths, ignored_flags, gitignores, ignored_dirs):
+        """Creates an inventory from parallel lists of relative paths and ignore verdicts."""
+        builder = _ColumnBuilder([], {}, [], {})
+        rows = sorted(zip(rel_paths, ignored_flags), key=lambda row: row[0].lower())
+        for rel_path, is_ignored in rows:
+            builder.append(rel_path, is_ignored)
+        return builder.finish(gitignores, ignored_dirs)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __bool__(self):
+        # An empty project still has a valid inventory
+        return True
+
+    def _path(self, i):
+        rel_dir = self._dirs[self._dir_ids[i]]
+        return f"{rel_dir}/{self._names[i]}" if rel_dir else self._names[i]
+
+    def __iter__(self):
+        dirs, names, exts = self._dirs, self._names, self._exts
+        for dir_id, name, is_ignored, ext_id in zip(self._dir_ids, names, self._ignored, self._ext_ids):
+            rel_dir = dirs[dir_id]
+            yield (f"{rel_dir}/{name}" if rel_dir else name), name.lower(), bool(is_ignored), exts[ext_id]
+
+    def paths(self):
+        dirs = self._dirs
+        for dir_id, name in zip(self._dir_ids, self._names):
+            rel_dir = dirs[dir_id]
+            yield f"{rel_dir}/{name}" if rel_dir else name
+
+    def entries(self):
+        """Yields (rel_dir, name, is_ignored) without joining paths."""
+        dirs = self._dirs
+        for dir_id, name, is_ignored in zip(self._dir_ids, self._names, self._ignored):
+            yield dirs[dir_id], name, bool(is_ignored)
+
+    def ignored_paths(self):
+        """Yields the paths of all files flagged as gitignored."""
+        for i, is_ignored in enumerate(self._ignored):
+            if is_ignored:
+                yield self._path(i)
+
+    def profile_paths(self, extensions, exact_filenames):
+        """
+        Yields the paths of non-ignored files matching the active filetypes.
+        Extensions are compared once per extension id instead of once per file.
+        """
+        allowed = bytearray(1 if ext in extensions else 0 for ext in self._exts)
+        dirs, names = self._dirs, self._names
+        for dir_id, name, is_ignored, ext_id in zip(self._dir_ids, names, self._ignored, self._ext_ids):
+            if is_ignored:
+                continue
+            if allowed[ext_id] or (exact_filenames and name.lower() in exact_filenames):
+                rel_dir = dirs[dir_id]
+                yield f"{rel_dir}/{name}" if rel_dir else name
+
+    def row(self, rel_path):
+        """Returns the (rel_path, name_lower, is_ignored, ext) row of a path, or None."""
+        i = self._find(rel_path)
+        if i < 0:
+            return None
+        return rel_path, self._names[i].lower(), bool(self._ignored[i]), self._exts[self._ext_ids[i]]
+
+    def _find(self, rel_path):
+        """Returns the row index of a path, or -1. Bisects on the case-folded order."""
+        key = rel_path.lower()
+        lo, hi = 0, len(self._names)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._path(mid).lower() < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        while lo < len(self._names):
+            candidate = self._path(lo)
+            if candidate.lower() != key:
+                break
+            if candidate == rel_path:
+                return lo
+            lo += 1
+        return -1
+
+    def _insert_position(self, key):
+        lo, hi = 0, len(self._names)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if key < self._path(mid).lower():
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    def with_changes(self, removed_paths, added_rows, ignored_dirs=None):
+        """
+        Returns a new inventory with the given paths removed and (rel_path, is_ignored) rows added.
+        Unchanged row ranges are copied as array slices; the original object is left untouched
+        because other threads may still be iterating it.
+        """
+        removed_paths = list(removed_paths)
+        added_rows = list(added_rows)
+        drops = sorted({i for i in (self._find(p) for p in removed_paths) if i >= 0})
+        additions = sorted(
+            ((self._insert_position(p.lower()), p.lower(), p, is_ignored) for p, is_ignored in added_rows),
+            key=lambda a: (a[0], a[1])
+        )
+
+        builder = _ColumnBuilder(list(self._dirs), self._dir_index(), list(self._exts), {e: i for i, e in enumerate(self._exts)})
+        add_i = 0
+        start = 0
+        for end in drops + [len(self._names)]:
+            while add_i < len(additions) and additions[add_i][0] <= end:
+                pos = max(additions[add_i][0], start)
+                builder.copy_rows(self, start, pos)
+                builder.append(additions[add_i][2], additions[add_i][3])
+                start = pos
+                add_i += 1
+            builder.copy_rows(self, start, end)
+            start = end + 1
+
+        if builder.fragmented:
+            builder.compact()
+        result = builder.finish(self.gitignores, self.ignored_dirs if ignored_dirs is None else ignored_dirs)
+        result.base_revision = self.revision
+        result.changed_paths = tuple(removed_paths) + tuple(p for p, _ in added_rows)
+        return result
+
+    def _dir_index(self):
+        return {rel_dir: i for i, rel_dir in enumerate(self._dirs)}
+
+class _ColumnBuilder:
+    """Accumulates inventory columns, interning directories and extensions as it goes."""
+    def __init__(self, dirs, dir_index, exts, ext_index):
+        self.dirs = dirs
+        self.dir_index = dir_index
+        self.exts = exts
+        self.ext_index = ext_index
+        self.dir_ids = array('I')
+        self.names = []
+        self.ignored = bytearray()
+        self.ext_ids = array('I')
+
+    def append(self, rel_path, is_ignored):
+        rel_dir, name = _split(rel_path)
+        dir_id = self.dir_index.get(rel_dir)
+        if dir_id is None:
+            dir_id = self.dir_index[rel_dir] = len(self.dirs)
+            self.dirs.append(rel_dir)
+        ext = os.path.splitext(name.lower())[1]
+        ext_id = self.ext_index.get(ext)
+        if ext_id is None:
+            ext_id = self.ext_index[ext] = len(self.exts)
+            self.exts.append(ext)
+        self.dir_ids.append(dir_id)
+        self.names.append(name)
+        self.ignored.append(1 if is_ignored else 0)
+        self.ext_ids.append(ext_id)
+
+    def copy_rows(self, source, start, end):
+        # Tables are only ever appended to, so the source ids remain valid
+        if start >= end:
+            return
+        self.dir_ids.extend(source._dir_ids[start:end])
+        self.names.extend(source._names[start:end])
+        self.ignored.extend(source._ignored[start:end])
+        self.ext_ids.extend(source._ext_ids[start:end])
+
+    @property
+    def fragmented(self):
+        """True once more interned directories or extensions are unused than used."""
+        live_dirs = len(set(self.dir_ids))
+        live_exts = len(set(self.ext_ids))
+        return len(self.dirs) - live_dirs > live_dirs or len(self.exts) - live_exts > live_exts
+
+    def compact(self):
+        """Drops unused directory and extension entries, renumbering the ids in row order."""
+        self.dirs, self.dir_index, self.dir_ids = self._compact_table(self.dirs, self.dir_ids)
+        self.exts, self.ext_index, self.ext_ids = self._compact_table(self.exts, self.ext_ids)
+
+    @staticmethod
+    def _compact_table(values, ids):
+        remap = {}
+        new_values = []
+        for old_id in ids:
+            if old_id not in remap:
+                remap[old_id] = len(new_values)
+                new_values.append(values[old_id])
+        new_ids = array('I', [remap[old_id] for old_id in ids])
+        return new_values, {value: i for i, value in enumerate(new_values)}, new_ids
+
+    def finish(self, gitignores, ignored_dirs):
+        return Inventory(self.dirs, self.dir_ids, self.names, self.ignored, self.exts, self.ext_ids, gitignores, ignored_dirs)
@@ -0,0 +1,120 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from .file_scanner import IncrementalInventoryScanner, enrich_inventory, apply_inventory_delta, expand_ignored_subtrees, get_scan_worker_count
+from .inventory_snapshot import load_inventory_snapshot
+from .path_index import PathIndex
+from .tree_cache import TreeCache
+from .. import constants as c
+
+log = logging.getLogger("CodeMerger")
+
+class InventoryCache:
+    """
+    Bounded cache of enriched inventories for projects other than the active one, such as
+    Project Starter base projects. Each entry keeps its incremental scanner, so a revisit
+    only re-lists the directories whose mtime moved (at most every INVENTORY_CACHE_RECHECK_SECONDS).
+    New entries are seeded from the project's inventory snapshot when it has one.
+    Entries unused for INVENTORY_CACHE_MAX_AGE_SECONDS are dropped, and the least recently
+    used ones go first once the estimated memory exceeds INVENTORY_CACHE_MAX_BYTES.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        # normalized base dir -> entry dict
+        self._entries = OrderedDict()
+        self.tree_cache = TreeCache()
+
+    def get(self, base_dir, is_git_filter=True):
+        """Returns the inventory of a project, with gitignored subtrees walked if 'is_git_filter' is off."""
+        key = os.path.normcase(os.path.abspath(base_dir))
+        with self._lock:
+            now = time.time()
+            self._evict_expired(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._load(base_dir)
+            elif now - entry['checked'] >= c.INVENTORY_CACHE_RECHECK_SECONDS:
+                self._refresh(base_dir, entry)
+            entry['checked'] = entry['used'] = now
+
+            inventory = entry['inventory']
+            if not is_git_filter and inventory.ignored_dirs:
+                if entry['expanded'][0] is not inventory:
+                    entry['expanded'] = (inventory, expand_ignored_subtrees(base_dir, inventory))
+                inventory = entry['expanded'][1]
+
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._evict_oversize()
+            return inventory
+
+    def get_path_index(self, base_dir, inventory):
+        """Returns a PathIndex for an inventory handed out by get(), caught up or rebuilt as needed."""
+        key = os.path.normcase(os.path.abspath(base_dir))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            # One index per flavor: the plain inventory and the one with gitignored subtrees walked
+            flavor = 'base' if inventory is entry['inventory'] else 'expanded'
+            index = entry['path_indexes'].get(flavor)
+            if index is not None and index.revision != inventory.revision:
+                if index.revision == inventory.base_revision:
+                    index.apply(inventory, inventory.changed_paths)
+                else:
+                    index = None
+            if index is None:
+                index = entry['path_indexes'][flavor] = PathIndex.build(inventory)
+            return index
+
+    def _load(self, base_dir):
+        scanner = IncrementalInventoryScanner(base_dir, workers=get_scan_worker_count())
+        entry = {'scanner': scanner, 'inventory': None, 'expanded': (None, None), 'path_indexes': {}, 'checked': 0, 'used': 0}
+        snapshot = load_inventory_snapshot(base_dir)
+        if snapshot:
+            scanner_state, ignored_paths = snapshot
+            try:
+                scanner.import_state(scanner_state)
+                entry['inventory'] = enrich_inventory(base_dir, scanner.get_raw_inventory(), ignored_paths=ignored_paths)
+            except (KeyError, TypeError, ValueError) as e:
+                log.warning(f"Ignoring unreadable inventory snapshot of {base_dir}: {e}")
+                scanner.reset()
+        self._refresh(base_dir, entry)
+        log.info(f"Cached inventory of {base_dir} ({len(entry['inventory'])} files).")
+        return entry
+
+    def _refresh(self, base_dir, entry):
+        """Brings an entry up to date with the disk; the inventory object is kept when nothing changed."""
+        scanner = entry['scanner']
+        inventory = entry['inventory']
+        delta = scanner.scan()
+        if inventory is None or delta['full'] or delta['gitignores_changed']:
+            entry['inventory'] = enrich_inventory(base_dir, scanner.get_raw_inventory())
+        elif delta['added'] or delta['removed'] or delta['ignored_dirs'] != inventory.ignored_dirs:
+            entry['inventory'], _ = apply_inventory_delta(base_dir, inventory, delta)
+
+    @staticmethod
+    def _estimated_bytes(entry):
+        files = len(entry['inventory'])
+        expanded = entry['expanded'][1]
+        if expanded is not None:
+            files += len(expanded)
+        return files * c.INVENTORY_CACHE_BYTES_PER_FILE
+
+    def _evict_expired(self, now):
+        for key in [k for k, entry in self._entries.items() if now - entry['used'] > c.INVENTORY_CACHE_MAX_AGE_SECONDS]:
+            del self._entries[key]
+
+    def _evict_oversize(self):
+        # The most recent entry always stays, even if it alone exceeds the budget
+        total = sum(self._estimated_bytes(entry) for entry in self._entries.values())
+        while len(self._entries) > 1 and (len(self._entries) > c.INVENTORY_CACHE_MAX_PROJECTS or total > c.INVENTORY_CACHE_MAX_BYTES):
+            _, evicted = self._entries.popitem(last=False)
+            total -= self._estimated_bytes(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.tree_cache.clear()
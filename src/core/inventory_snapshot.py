@@ -0,0 +1,80 @@
+import os
+import json
+import zlib
+import hashlib
+import logging
+import tempfile
+from .paths import INVENTORY_CACHE_DIR
+from .. import constants as c
+
+log = logging.getLogger("CodeMerger")
+
+# Bump the version whenever the scanner state layout changes; older snapshots are then ignored
+_SNAPSHOT_MAGIC = b'CMINV'
+_SNAPSHOT_VERSION = 1
+
+def _snapshot_path(base_dir):
+    """Snapshots are keyed by a hash of the normalized project path."""
+    key = os.path.normcase(os.path.abspath(base_dir)).replace('\\', '/')
+    return os.path.join(INVENTORY_CACHE_DIR, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.bin')
+
+def save_inventory_snapshot(base_dir, scanner_state, inventory):
+    """
+    Writes the scanner state plus the ignore verdicts of the enriched inventory to a
+    zlib-compressed snapshot. Everything else in the inventory is derived on load.
+    """
+    payload = {
+        'base_dir': os.path.abspath(base_dir),
+        'skip': sorted(c.SPECIAL_FILES_TO_IGNORE),
+        'state': scanner_state,
+        'ignored_files': list(inventory.ignored_paths())
+    }
+    data = _SNAPSHOT_MAGIC + bytes([_SNAPSHOT_VERSION]) + zlib.compress(
+        json.dumps(payload, separators=(',', ':')).encode('utf-8'), 6
+    )
+
+    temp_path = None
+    try:
+        os.makedirs(INVENTORY_CACHE_DIR, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=INVENTORY_CACHE_DIR, prefix=c.CODEMERGER_TEMP_PREFIX)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, _snapshot_path(base_dir))
+        temp_path = None
+    except OSError as e:
+        log.warning(f"Could not write inventory snapshot for {base_dir}: {e}")
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            try: os.remove(temp_path)
+            except Exception: pass
+
+def load_inventory_snapshot(base_dir):
+    """
+    Reads the snapshot of a project.
+    Returns a tuple: (scanner_state, set of ignored file paths), or None if there is no usable snapshot.
+    """
+    try:
+        with open(_snapshot_path(base_dir), 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    header_size = len(_SNAPSHOT_MAGIC) + 1
+    if data[:len(_SNAPSHOT_MAGIC)] != _SNAPSHOT_MAGIC or data[header_size - 1:header_size] != bytes([_SNAPSHOT_VERSION]):
+        return None
+
+    try:
+        payload = json.loads(zlib.decompress(data[header_size:]).decode('utf-8'))
+    except (zlib.error, ValueError) as e:
+        log.warning(f"Discarding corrupt inventory snapshot for {base_dir}: {e}")
+        return None
+
+    if not isinstance(payload, dict):
+        return None
+    if payload.get('base_dir') != os.path.abspath(base_dir) or payload.get('skip') != sorted(c.SPECIAL_FILES_TO_IGNORE):
+        return None
+    try:
+        return payload['state'], set(payload['ignored_files'])
+    except (KeyError, TypeError) as e:
+        log.warning(f"Discarding corrupt inventory snapshot for {base_dir}: {e}")
+        return None
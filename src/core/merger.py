@@ -1,46 +1,96 @@
+import io
 import os
 from .. import constants as c
 from .prompts import (
     INSTR_FULL_FILE, INSTR_FAST_APPLY, EXAMPLE_FULL_FILE, EXAMPLE_FAST_APPLY,
     FORMATTING_INSTRUCTION_TEMPLATE, AUTOMATION_WARNING_TEMPLATE
 )
-from .utils import get_token_count_for_text
+from .token_cache import get_file_token_info
+from .block_cache import block_cache
 
 def get_language_from_path(path):
     """Maps file extensions to Markdown code block identifiers"""
     _, ext = os.path.splitext(path)
     return c.LANGUAGE_MAP.get(ext.lower(), '')
 
-def generate_output_string(base_dir, project_config, use_wrapper, copy_merged_prompt, enable_fast_apply=False):
+class MergeWriter:
     """
-    Concatenates selected files into a single machine-parseable string
-    Returns the final string and a status message
+    Assembles merge output in one growable buffer, or streams it into a text file object
+    passed as 'sink'. Blocks of files up to BLOCK_CACHE_MAX_FILE_BYTES are rendered once and
+    reused from block_cache while the file is unchanged; larger files are copied in
+    MERGE_READ_CHUNK_CHARS chunks, so their content is never held next to the output.
     """
-    if not project_config.selected_files:
-        return None, "No files selected to copy"
-
-    final_ordered_list = [f['path'] for f in project_config.selected_files]
+    def __init__(self, sink=None):
+        self._sink = sink if sink is not None else io.StringIO()
+        self.block_count = 0
+        self.skipped_files = []
 
-    output_blocks = []
-    skipped_files = []
+    def write(self, text):
+        self._sink.write(text)
 
-    for path in final_ordered_list:
+    def write_file_block(self, base_dir, path):
+        """Appends one file as a marked, fenced block; missing or unreadable files are recorded as skipped."""
         full_path = os.path.join(base_dir, path)
-        if not os.path.isfile(full_path):
-            skipped_files.append(path)
-            continue
-        with open(full_path, 'r', encoding='utf-8-sig', errors='ignore') as code_file:
-            content = code_file.read()
+        try:
+            st = os.stat(full_path)
+            block = block_cache.get(full_path, path, st)
+            code_file = None if block is not None else open(full_path, 'r', encoding='utf-8-sig', errors='ignore')
+        except OSError:
+            self.skipped_files.append(path)
+            return False
 
-        language = get_language_from_path(path)
+        if self.block_count:
+            self._sink.write('\n\n')
+        self.block_count += 1
+        if block is not None:
+            self._sink.write(block)
+            return True
 
         # Build block using central markers
-        block_header = f"{c.MARKER_PREFIX}{c.MARKER_FILE}`{path}` ---"
-        block_footer = f"{c.MARKER_PREFIX}{c.MARKER_EOF} ---"
-
-        output_blocks.append(f"{block_header}\n```{language}\n{content}\n```\n{block_footer}")
+        header = f"{c.MARKER_PREFIX}{c.MARKER_FILE}`{path}` ---\n```{get_language_from_path(path)}\n"
+        footer = f"\n```\n{c.MARKER_PREFIX}{c.MARKER_EOF} ---"
+        with code_file:
+            if st.st_size <= c.BLOCK_CACHE_MAX_FILE_BYTES:
+                block = header + code_file.read() + footer
+                block_cache.put(full_path, path, st, block)
+                self._sink.write(block)
+                return True
+
+            self._sink.write(header)
+            while True:
+                chunk = code_file.read(c.MERGE_READ_CHUNK_CHARS)
+                if not chunk:
+                    break
+                self._sink.write(chunk)
+            self._sink.write(footer)
+        return True
+
+    def write_file_blocks(self, base_dir, paths):
+        for path in paths:
+            self.write_file_block(base_dir, path)
+
+    def write_template(self, template, field, write_field, **values):
+        """
+        Writes a str.format template whose 'field' placeholder is produced by calling
+        write_field() instead of being formatted in as one large string.
+        """
+        before, after = template.split('{' + field + '}', 1)
+        self._sink.write(before.format(**values))
+        write_field()
+        self._sink.write(after.format(**values))
+
+    def getvalue(self):
+        return self._sink.getvalue()
+
+def write_output(writer, base_dir, project_config, use_wrapper, copy_merged_prompt, enable_fast_apply=False):
+    """
+    Writes the selected files as a machine-parseable merge into 'writer'
+    Returns a status message, or None when no files are selected
+    """
+    if not project_config.selected_files:
+        return None
 
-    merged_code = '\n\n'.join(output_blocks)
+    final_ordered_list = [f['path'] for f in project_config.selected_files]
 
     if use_wrapper:
         project_title = project_config.project_name
@@ -70,60 +120,51 @@ def generate_output_string(base_dir, project_config, use_wrapper, copy_merged_pr
             marker_file=c.MARKER_FILE
         )
 
-        final_parts = [f"# {project_title}"]
-
+        header_parts = [f"# {project_title}"]
         if intro_text:
-            final_parts.append(intro_text)
-
-        final_parts.append(formatting_instruction)
-        final_parts.append("## Project Files")
-        final_parts.append(merged_code)
+            header_parts.append(intro_text)
+        header_parts.append(formatting_instruction)
+        header_parts.append("## Project Files")
 
         footer_parts = []
         if outro_text:
             footer_parts.append(outro_text)
         footer_parts.append(automation_warning)
 
-        final_parts.append('\n\n'.join(footer_parts))
-
-        final_content = '\n\n'.join(final_parts) + '\n'
+        writer.write('\n\n'.join(header_parts) + '\n\n')
+        writer.write_file_blocks(base_dir, final_ordered_list)
+        writer.write('\n\n' + '\n\n'.join(footer_parts) + '\n')
         status_message = "Wrapped code copied as Markdown"
     else:
         if copy_merged_prompt:
-            final_content = copy_merged_prompt + "\n\n" + merged_code
-        else:
-            final_content = merged_code
+            writer.write(copy_merged_prompt + "\n\n")
+        writer.write_file_blocks(base_dir, final_ordered_list)
         status_message = "Merged code copied as Markdown"
 
-    if skipped_files:
-        status_message += f". Skipped {len(skipped_files)} missing file(s)"
+    if writer.skipped_files:
+        status_message += f". Skipped {len(writer.skipped_files)} missing file(s)"
+
+    return status_message
 
-    return final_content, status_message
+def generate_output_string(base_dir, project_config, use_wrapper, copy_merged_prompt, enable_fast_apply=False):
+    """
+    Concatenates selected files into a single machine-parseable string
+    Returns the final string and a status message
+    """
+    writer = MergeWriter()
+    status_message = write_output(writer, base_dir, project_config, use_wrapper, copy_merged_prompt, enable_fast_apply)
+    if status_message is None:
+        return None, "No files selected to copy"
+    return writer.getvalue(), status_message
 
 def generate_subset_output(base_dir, paths):
     """
     Bundles a specific list of file paths into standard CodeMerger Markdown blocks.
     Used by the Visualizer to copy code for specific nodes/subtrees.
     """
-    output_blocks = []
-    for path in paths:
-        full_path = os.path.join(base_dir, path)
-        if not os.path.isfile(full_path):
-            continue
-        try:
-            with open(full_path, 'r', encoding='utf-8-sig', errors='ignore') as code_file:
-                content = code_file.read()
-        except OSError:
-            continue
-
-        language = get_language_from_path(path)
-
-        block_header = f"{c.MARKER_PREFIX}{c.MARKER_FILE}`{path}` ---"
-        block_footer = f"{c.MARKER_PREFIX}{c.MARKER_EOF} ---"
-
-        output_blocks.append(f"{block_header}\n```{language}\n{content}\n```\n{block_footer}")
-
-    return '\n\n'.join(output_blocks)
+    writer = MergeWriter()
+    writer.write_file_blocks(base_dir, paths)
+    return writer.getvalue()
 
 def recalculate_token_count(base_dir, selected_files_info):
     """
@@ -136,16 +177,10 @@ def recalculate_token_count(base_dir, selected_files_info):
 
     total = 0
     for file_info in selected_files_info:
-        rel_path = file_info['path']
-        full_path = os.path.join(base_dir, rel_path)
-        try:
-            with open(full_path, 'r', encoding='utf-8-sig', errors='ignore') as f:
-                content = f.read()
-                # Individual token counts are faster and more memory efficient than joining strings
-                count = get_token_count_for_text(content)
-                if count > 0:
-                    total += count
-        except FileNotFoundError:
-            continue
+        full_path = os.path.join(base_dir, file_info['path'])
+        # Unchanged files are answered from the persistent token cache without being read
+        info = get_file_token_info(full_path)
+        if info and info['tokens'] > 0:
+            total += info['tokens']
 
     return total
\ No newline at end of file
@@ -0,0 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# How long the coordinator blocks before re-checking the cancel event
+_POLL_SECONDS = 0.1
+
+def run_directory_walk(roots, fetch, apply, workers=1, cancel_event=None):
+    """
+    Drives a directory walk that is split into an I/O half and a bookkeeping half.
+      - fetch(item) performs the blocking disk access (stat, scandir, .gitignore reads).
+        With workers > 1 it runs on a thread pool, so it must not mutate shared state.
+      - apply(item, result) always runs on the calling thread, in an order where a
+        directory is applied before any of its children are fetched. It returns the
+        child items to visit next.
+    Readdir on network mounts is latency-bound and releases the GIL, so keeping many
+    directories in flight at once hides most of the round-trip time.
+    Returns False if the walk was cancelled, True otherwise.
+    """
+    stack = list(roots)
+
+    if workers <= 1:
+        while stack:
+            if cancel_event and cancel_event.is_set():
+                return False
+            item = stack.pop()
+            stack.extend(apply(item, fetch(item)))
+        return True
+
+    in_flight = {}
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="CodeMergerScan")
+    try:
+        while stack or in_flight:
+            if cancel_event and cancel_event.is_set():
+                return False
+
+            # Idle workers pick up whatever is queued next, keeping the pool saturated
+            while stack:
+                item = stack.pop()
+                in_flight[executor.submit(fetch, item)] = item
+
+            done, _ = wait(in_flight, timeout=_POLL_SECONDS, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = in_flight.pop(future)
+                stack.extend(apply(item, future.result()))
+        return True
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,191 @@
+import os
+import bisect
+import threading
+from array import array
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _intersect(ids, posting):
+    """Intersects a sorted id list with a sorted posting array, probing the larger side by bisection."""
+    if len(ids) * 8 < len(posting):
+        result = []
+        for i in ids:
+            j = bisect.bisect_left(posting, i)
+            if j < len(posting) and posting[j] == i:
+                result.append(i)
+        return result
+    members = set(ids)
+    return [i for i in posting if i in members]
+
+def _lookup(postings, grams):
+    """Returns the sorted ids whose text contains every trigram, smallest posting list first."""
+    lists = []
+    for gram in grams:
+        posting = postings.get(gram)
+        if posting is None:
+            return []
+        lists.append(posting)
+    lists.sort(key=len)
+    ids = list(lists[0])
+    for posting in lists[1:]:
+        if not ids:
+            break
+        ids = _intersect(ids, posting)
+    return ids
+
+class PathIndex:
+    """
+    Trigram index answering case-insensitive substring queries over inventory paths.
+    Directories and file names are indexed separately instead of every full path: a match
+    lies inside "dir/", inside the name, or spans the final slash (a "dir/" suffix plus a
+    name prefix). Both tables are far smaller than the file list, which keeps building
+    and memory cheap. Ids are never reused, so posting arrays stay sorted by appending;
+    entries of deleted directories and names simply stay behind as dead ids.
+    'revision' is the Inventory revision the index reflects.
+    """
+    # Past this share of all files a linear scan is cheaper than assembling rows from the index
+    _MAX_MATCH_RATIO = 0.25
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.revision = None
+        self._file_count = 0
+        self._dirs = []
+        self._dir_texts = []
+        self._dir_ids = {}
+        # dir id -> {file name: is_ignored}
+        self._dir_files = []
+        self._dir_grams = {}
+        # Names are interned case-sensitively; only their trigrams are case-folded
+        self._names = []
+        self._name_texts = []
+        self._name_ids = {}
+        # name id -> set of dir ids holding a file with that name
+        self._name_dirs = []
+        self._name_grams = {}
+
+    @classmethod
+    def build(cls, inventory):
+        index = cls()
+        for rel_dir, name, is_ignored in inventory.entries():
+            index._add(rel_dir, name, is_ignored)
+        index.revision = inventory.revision
+        return index
+
+    def apply(self, inventory, touched_paths):
+        """Catches the index up with an inventory derived from its revision through 'touched_paths'."""
+        with self._lock:
+            for rel_path in touched_paths:
+                rel_dir, _, name = rel_path.rpartition('/')
+                row = inventory.row(rel_path)
+                if row is None:
+                    self._remove(rel_dir, name)
+                else:
+                    self._add(rel_dir, name, row[2])
+            self.revision = inventory.revision
+
+    def _add(self, rel_dir, name, is_ignored):
+        dir_id = self._dir_ids.get(rel_dir)
+        if dir_id is None:
+            dir_id = self._dir_ids[rel_dir] = len(self._dirs)
+            self._dirs.append(rel_dir)
+            # The slash is part of the path for everything but root files
+            text = rel_dir.lower() + '/' if rel_dir else ''
+            self._dir_texts.append(text)
+            self._dir_files.append({})
+            grams = self._dir_grams
+            for gram in _trigrams(text):
+                posting = grams.get(gram)
+                if posting is None:
+                    posting = grams[gram] = array('I')
+                posting.append(dir_id)
+
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self._names)
+            text = name.lower()
+            self._names.append(name)
+            self._name_texts.append(text)
+            self._name_dirs.append(set())
+            grams = self._name_grams
+            for gram in _trigrams(text):
+                posting = grams.get(gram)
+                if posting is None:
+                    posting = grams[gram] = array('I')
+                posting.append(name_id)
+
+        files = self._dir_files[dir_id]
+        if name not in files:
+            self._file_count += 1
+        files[name] = bool(is_ignored)
+        self._name_dirs[name_id].add(dir_id)
+
+    def _remove(self, rel_dir, name):
+        dir_id = self._dir_ids.get(rel_dir)
+        if dir_id is None or self._dir_files[dir_id].pop(name, None) is None:
+            return
+        self._file_count -= 1
+        self._name_dirs[self._name_ids[name]].discard(dir_id)
+
+    def _rows(self, dir_id, names=None):
+        rel_dir = self._dirs[dir_id]
+        files = self._dir_files[dir_id]
+        for name in files if names is None else names:
+            name_lower = name.lower()
+            yield (f"{rel_dir}/{name}" if rel_dir else name), name_lower, files[name], os.path.splitext(name_lower)[1]
+
+    def search(self, query):
+        """
+        Returns the (rel_path, name_lower, is_ignored, ext) rows whose path contains the
+        lowercase 'query', in no particular order. Returns None for queries shorter than
+        three characters, which carry no trigram, and for queries matching a large share of
+        the project; callers then scan the inventory instead.
+        """
+        if len(query) < 3:
+            return None
+        grams = _trigrams(query)
+        limit = max(1000, int(self._file_count * self._MAX_MATCH_RATIO))
+        rows = []
+        with self._lock:
+            # 1. Inside "dir/": every file of the directory matches
+            matched_dirs = set()
+            for dir_id in _lookup(self._dir_grams, grams):
+                if query in self._dir_texts[dir_id] and self._dir_files[dir_id]:
+                    matched_dirs.add(dir_id)
+                    rows.extend(self._rows(dir_id))
+                    if len(rows) > limit:
+                        return None
+
+            # 2. Inside the file name
+            if '/' not in query:
+                name_ids = _lookup(self._name_grams, grams)
+                if len(name_ids) > limit:
+                    return None
+                for name_id in name_ids:
+                    if query not in self._name_texts[name_id]:
+                        continue
+                    names = (self._names[name_id],)
+                    for dir_id in self._name_dirs[name_id]:
+                        if dir_id not in matched_dirs:
+                            rows.extend(self._rows(dir_id, names))
+                    if len(rows) > limit:
+                        return None
+                return rows
+
+            # 3. Across the final slash: a suffix of "dir/" followed by a prefix of the name
+            slash = query.rfind('/')
+            dir_suffix, name_prefix = query[:slash + 1], query[slash + 1:]
+            if not name_prefix:
+                return rows
+            suffix_grams = _trigrams(dir_suffix)
+            dir_ids = _lookup(self._dir_grams, suffix_grams) if suffix_grams else range(len(self._dirs))
+            for dir_id in dir_ids:
+                if dir_id in matched_dirs or not self._dir_texts[dir_id].endswith(dir_suffix):
+                    continue
+                names = [n for n in self._dir_files[dir_id] if n.lower().startswith(name_prefix)]
+                if names:
+                    rows.extend(self._rows(dir_id, names))
+                    if len(rows) > limit:
+                        return None
+        return rows
@@ -33,6 +33,8 @@ BUNDLE_DIR = get_bundle_dir()
 PERSISTENT_DATA_DIR = get_persistent_data_dir()
 
 CONFIG_FILE_PATH = os.path.join(PERSISTENT_DATA_DIR, 'config.json')
+INVENTORY_CACHE_DIR = os.path.join(PERSISTENT_DATA_DIR, 'inventory_cache')
+TOKEN_CACHE_PATH = os.path.join(PERSISTENT_DATA_DIR, 'token_cache.bin')
 
 DEFAULT_FILETYPES_CONFIG_PATH = os.path.join(BUNDLE_DIR, 'default_filetypes.json')
 
@@ -7,7 +7,8 @@ import shutil
 import re
 from pathlib import Path
 from ..constants import COMPACT_MODE_BG_COLOR
-from .utils import get_token_count_for_text, calculate_font_color, get_file_hash
+from .utils import calculate_font_color
+from .token_cache import get_file_token_info
 from .config_io import (
     generate_random_color, ensure_dir_hidden, write_hi_text,
     atomic_write, read_project_display_info
@@ -31,6 +32,8 @@ class ProjectConfig:
         self.project_name = os.path.basename(self.base_dir)
         self.project_color = COMPACT_MODE_BG_COLOR
         self.project_font_color = 'light'
+        # tiktoken encoding for this project's token counts; None uses TOKEN_ENCODING_DEFAULT
+        self.token_encoding = None
         self.known_files = []
 
         self.profiles = {}
@@ -267,6 +270,7 @@ class ProjectConfig:
             self.project_name = loaded_data.get('project_name', os.path.basename(self.base_dir))
             self.project_color = loaded_data.get('project_color', generate_random_color())
             self.project_font_color = loaded_data.get('project_font_color', calculate_font_color(self.project_color))
+            self.token_encoding = loaded_data.get('token_encoding')
             self.active_profile_name = self._sanitize_profile_name(loaded_data.get('active_profile', 'default'))
             self.profiles = loaded_profiles
 
@@ -310,14 +314,9 @@ class ProjectConfig:
                 norm_path = f_path.replace('\\', '/')
                 full_path = os.path.join(self.base_dir, norm_path)
                 if os.path.isfile(full_path):
-                    try:
-                        with open(full_path, 'r', encoding='utf-8', errors='ignore') as f: content = f.read()
-                        mtime = os.path.getmtime(full_path)
-                        file_hash = get_file_hash(full_path)
-                        tokens = get_token_count_for_text(content)
-                        lines = content.count('\n') + 1
-                        cleaned_selection.append({'path': norm_path, 'mtime': mtime, 'hash': file_hash, 'tokens': tokens, 'lines': lines})
-                    except OSError: continue
+                    info = get_file_token_info(full_path)
+                    if info is None: continue
+                    cleaned_selection.append({'path': norm_path, 'mtime': info['mtime'], 'size': info['size'], 'hash': info['hash'], 'tokens': info['tokens'], 'lines': info['lines']})
         else:
             for f_info in original_selection:
                 if os.path.isfile(os.path.join(self.base_dir, f_info['path'])):
@@ -356,6 +355,8 @@ class ProjectConfig:
                 "project_font_color": self.project_font_color,
                 "active_profile": self.active_profile_name
             }
+            if self.token_encoding:
+                config_data["token_encoding"] = self.token_encoding
 
             atomic_write(self.config_file, config_data)
             self._last_mtimes[self.config_file] = os.path.getmtime(self.config_file)
@@ -2,9 +2,19 @@ import os
 import threading
 import logging
 import time
+from collections import deque
 from .project_config import ProjectConfig
 from .utils import calculate_font_color
-from .file_scanner import get_all_matching_files
+from .file_scanner import expand_ignored_subtrees, enrich_inventory, get_scan_worker_count, IncrementalInventoryScanner
+from .inventory_snapshot import load_inventory_snapshot, save_inventory_snapshot
+from .scan_progress import ScanProgress
+from .file_tree_model import FileTreeModel
+from .tree_cache import TreeCache
+from .inventory_cache import InventoryCache
+from .path_index import PathIndex
+from .fuzzy_finder import FuzzyFinder
+from .tokenizer import tokenizer
+from .. import constants as c
 
 log = logging.getLogger("CodeMerger")
 
@@ -20,9 +30,34 @@ class ProjectManager:
         self._disk_inventory = None
         self._inventory_timestamp = 0
         self._inventory_lock = threading.Lock()
+        # (base inventory, expanded inventory) - gitignored subtrees walked on demand
+        self._expanded_inventory = (None, None)
+        # (base_revision, revision, changed paths) of recent delta-derived inventories
+        self._inventory_changes = deque(maxlen=c.INVENTORY_CHANGE_LOG_SIZE)
+        # Built file trees, keyed by inventory revision, filters and selection
+        self.tree_cache = TreeCache()
+        # File manager tree, patched from inventory and selection changes
+        self.tree_model = FileTreeModel(self.tree_cache)
+        # Search indexes over the inventory: trigrams for the tree filter, bitsets for quick-open
+        self._path_index = None
+        self._fuzzy_finder = None
+        self._path_index_lock = threading.Lock()
+        # Inventories of projects browsed without being loaded (Project Starter base projects)
+        self.reference_inventories = InventoryCache()
+        # Time of the last file manager interaction; background work yields while it is recent
+        self._last_user_activity = 0
 
         # Concurrency Lock: Prevents multiple threads from performing a disk walk at the same time
         self._scan_lock = threading.Lock()
+        # Incremental scanner backing the inventory; only scanned while holding _scan_lock
+        self._scanner = None
+
+    def mark_user_activity(self):
+        """Records a user interaction so that idle-priority background work pauses."""
+        self._last_user_activity = time.monotonic()
+
+    def is_user_active(self):
+        return time.monotonic() - self._last_user_activity < c.TOKEN_PRECOMPUTE_IDLE_SECONDS
 
     def get_inventory(self):
         """Returns the cached disk inventory and its age."""
@@ -34,22 +69,129 @@ class ProjectManager:
         with self._inventory_lock:
             self._disk_inventory = inventory
             self._inventory_timestamp = time.time()
+            if inventory is not None and inventory.base_revision is not None:
+                self._inventory_changes.append((inventory.base_revision, inventory.revision, inventory.changed_paths))
 
-    def _populate_new_project_files(self, project_config, cancel_event=None, reset_selection=True):
+    def get_inventory_changes(self, from_revision, to_revision):
         """
-        Helper method to scan for files and populate the ProjectConfig for a new project.
+        Returns the set of paths touched between two inventory revisions,
+        or None if the recorded deltas do not link them.
+        """
+        touched = set()
+        revision = from_revision
+        with self._inventory_lock:
+            for base_revision, new_revision, changed_paths in self._inventory_changes:
+                if base_revision == revision:
+                    touched.update(changed_paths)
+                    revision = new_revision
+        return touched if revision == to_revision else None
+
+    def get_path_index(self, inventory, build=False):
         """
-        all_project_files = get_all_matching_files(
-            base_dir=project_config.base_dir,
-            file_extensions=self.get_active_file_extensions(),
-            gitignore_patterns=None,
-            cancel_event=cancel_event
-        )
+        Returns the PathIndex for the given inventory, catching it up through the recorded deltas.
+        Returns None if the index cannot be linked to the inventory, unless 'build' is set, in which
+        case it is rebuilt. Building is left to the file monitor so filtering never waits for it.
+        """
+        return self._get_linked_index('_path_index', PathIndex, inventory, build)
+
+    def get_fuzzy_finder(self, inventory, build=False):
+        """Returns the quick-open FuzzyFinder for the given inventory; same rules as get_path_index."""
+        return self._get_linked_index('_fuzzy_finder', FuzzyFinder, inventory, build)
+
+    def _get_linked_index(self, attr, index_class, inventory, build):
+        if not inventory:
+            return None
+        with self._path_index_lock:
+            index = getattr(self, attr)
+            if index is not None:
+                if index.revision == inventory.revision:
+                    return index
+                touched = self.get_inventory_changes(index.revision, inventory.revision)
+                # An index full of holes from removed paths is cheaper to rebuild than to keep
+                if touched is not None and not getattr(index, 'fragmented', False):
+                    index.apply(inventory, touched)
+                    return index
+            if not build:
+                return None
+            index = index_class.build(inventory)
+            setattr(self, attr, index)
+            return index
+
+    def get_expanded_inventory(self, base_dir):
+        """
+        Returns the cached inventory with its collapsed gitignored directories walked.
+        The expansion is reused for as long as the base inventory object stays the same.
+        """
+        inventory, _ = self.get_inventory()
+        if not inventory or not inventory.ignored_dirs:
+            return inventory
+
+        cached_base, cached_expanded = self._expanded_inventory
+        if cached_base is inventory:
+            return cached_expanded
+
+        expanded = expand_ignored_subtrees(base_dir, inventory)
+        self._expanded_inventory = (inventory, expanded)
+        return expanded
 
-        if cancel_event and cancel_event.is_set():
-            return False
+    def get_scanner(self, base_dir):
+        """Returns the incremental scanner of the active project. Callers must hold _scan_lock while scanning."""
+        if self._scanner is None or self._scanner.base_dir != base_dir:
+            self._scanner = IncrementalInventoryScanner(base_dir)
+        return self._scanner
 
-        project_config.known_files = all_project_files
+    def _restore_inventory_snapshot(self, base_dir):
+        """
+        Seeds the inventory and scanner from the on-disk snapshot of the previous session,
+        so the file tree renders immediately. The monitor's next incremental scan corrects it.
+        """
+        snapshot = load_inventory_snapshot(base_dir)
+        if not snapshot:
+            return
+        scanner_state, ignored_paths = snapshot
+        try:
+            scanner = IncrementalInventoryScanner(base_dir)
+            scanner.import_state(scanner_state)
+            inventory = enrich_inventory(base_dir, scanner.get_raw_inventory(), ignored_paths=ignored_paths)
+        except (KeyError, TypeError, ValueError) as e:
+            log.warning(f"Ignoring unreadable inventory snapshot: {e}")
+            return
+        self._scanner = scanner
+        self.set_inventory(inventory)
+        log.info(f"Restored inventory snapshot ({len(inventory)} files).")
+
+    def save_inventory_snapshot(self, base_dir):
+        """Persists the current scanner state and inventory of the active project."""
+        with self._scan_lock:
+            scanner = self._scanner
+            if scanner is None or scanner.base_dir != base_dir or not scanner.has_state:
+                return
+            scanner_state = scanner.export_state()
+            inventory, _ = self.get_inventory()
+        if inventory:
+            save_inventory_snapshot(base_dir, scanner_state, inventory)
+
+    def _populate_new_project_files(self, project_config, cancel_event=None, reset_selection=True, on_progress=None):
+        """
+        Helper method to scan for files and populate the ProjectConfig for a new project.
+        The same walk produces the enriched inventory, so the project never needs a second scan.
+        'on_progress' receives throttled ScanProgress updates.
+        Returns a tuple: (scanner, inventory), or None if the scan was cancelled.
+        """
+        base_dir = project_config.base_dir
+        scanner = IncrementalInventoryScanner(base_dir, workers=get_scan_worker_count())
+        progress = ScanProgress(f"Project scan of {base_dir}", on_progress)
+        delta = scanner.scan(cancel_event=cancel_event, progress=progress)
+        cancelled = delta is None or bool(cancel_event and cancel_event.is_set())
+        progress.finish(cancelled=cancelled)
+        if cancelled:
+            return None
+        inventory = enrich_inventory(base_dir, scanner.get_raw_inventory())
+
+        file_extensions = self.get_active_file_extensions()
+        extensions = {ext for ext in file_extensions if ext.startswith('.')}
+        exact_filenames = {ext for ext in file_extensions if not ext.startswith('.')}
+        project_config.known_files = sorted(inventory.profile_paths(extensions, exact_filenames))
 
         for p_data in project_config.profiles.values():
             p_data['unknown_files'] = []
@@ -57,18 +199,25 @@ class ProjectManager:
         if reset_selection:
             project_config.selected_files = []
             project_config.total_tokens = 0
-        return True
+        return scanner, inventory
 
-    def load_project(self, path, cancel_event=None):
+    def load_project(self, path, cancel_event=None, on_progress=None):
         """
         Loads a project from a given path. If no configuration exists,
         it initializes a new one. Passing None unloads the current project.
+        'on_progress' receives scan statistics while a new project is being indexed.
         Returns a tuple: (ProjectConfig object or None, status message string)
         """
         with self._lock:
             # Invalidate cache on project change
             self.set_inventory(None)
             self._inventory_timestamp = 0
+            # Plain reassignment: waiting on _scan_lock here would stall behind a scan of the old project
+            self._scanner = None
+            self.tree_cache = TreeCache()
+            self.tree_model = FileTreeModel(self.tree_cache)
+            self._path_index = None
+            self._fuzzy_finder = None
 
             if path is None:
                 self.project_config = None
@@ -101,20 +250,30 @@ class ProjectManager:
                     return None, f"Failed to load project: {e}"
                 files_were_cleaned = False
 
+            tokenizer.set_active_encoding(self.project_config.token_encoding)
+
+            if not (is_new_project or is_migration):
+                self._restore_inventory_snapshot(path)
+
             project_display_name = self.project_config.project_name
 
             if is_new_project or is_migration:
                 # For migrations, we scan to populate known_files but preserve existing selected_files
-                success = self._populate_new_project_files(
+                populated = self._populate_new_project_files(
                     self.project_config,
                     cancel_event=cancel_event,
-                    reset_selection=is_new_project
+                    reset_selection=is_new_project,
+                    on_progress=on_progress
                 )
 
-                if cancel_event and cancel_event.is_set():
+                if populated is None:
                     self.project_config = None
                     return None, "Load cancelled."
 
+                # Hand the walk straight to the inventory cache; no second scan is needed
+                self._scanner, inventory = populated
+                self.set_inventory(inventory)
+
                 self.project_config.save()
 
                 if is_new_project:
@@ -144,7 +303,7 @@ class ProjectManager:
                 config.project_color = project_color
                 config.project_font_color = calculate_font_color(project_color)
 
-            self._populate_new_project_files(config)
+            populated = self._populate_new_project_files(config)
 
             if initial_selected_files:
                 processed_selection = []
@@ -166,6 +325,11 @@ class ProjectManager:
             config.outro_text = outro_text
             config.save()
 
+            # Lets the following load_project render the tree from this walk
+            if populated:
+                scanner, inventory = populated
+                save_inventory_snapshot(path, scanner.export_state(), inventory)
+
     def get_current_project(self):
         """Returns the currently active ProjectConfig object."""
         with self._lock:
@@ -0,0 +1,65 @@
+import time
+import logging
+from .. import constants as c
+
+log = logging.getLogger("CodeMerger")
+
+class ScanProgress:
+    """
+    Collects walker statistics and reports them through a throttled callback.
+    The callback receives a dict: {dirs, files, files_per_sec, current, elapsed}.
+    Visits are recorded on the walker's coordinating thread, so no locking is needed.
+    """
+    def __init__(self, label, on_progress=None, interval=c.SCAN_PROGRESS_INTERVAL_SECONDS):
+        self.label = label
+        self.on_progress = on_progress
+        self.interval = interval
+        self.dirs = 0
+        self.files = 0
+        # top-level entry -> [dirs, files]; points at the subtrees that dominate a scan
+        self.subtrees = {}
+        self._start = time.perf_counter()
+        self._last_emit = self._start
+
+    def _snapshot(self, current):
+        elapsed = time.perf_counter() - self._start
+        return {
+            'dirs': self.dirs,
+            'files': self.files,
+            'files_per_sec': int(self.files / elapsed) if elapsed > 0 else 0,
+            'current': current,
+            'elapsed': round(elapsed, 2)
+        }
+
+    def visit(self, rel_dir, file_count):
+        """Records one listed directory and emits an update if the throttle interval passed."""
+        self.dirs += 1
+        self.files += file_count
+        top = rel_dir.partition('/')[0] or '.'
+        counts = self.subtrees.setdefault(top, [0, 0])
+        counts[0] += 1
+        counts[1] += file_count
+
+        if self.on_progress is None:
+            return
+        now = time.perf_counter()
+        if now - self._last_emit >= self.interval:
+            self._last_emit = now
+            try:
+                self.on_progress(self._snapshot(rel_dir))
+            except Exception as e:
+                log.debug(f"Scan progress callback failed: {e}")
+
+    def finish(self, cancelled=False):
+        """Logs the final statistics, including the heaviest top-level subtrees."""
+        stats = self._snapshot('')
+        state = "cancelled" if cancelled else "finished"
+        log.info(
+            f"{self.label} {state}: {stats['dirs']} dirs, {stats['files']} files "
+            f"in {stats['elapsed']}s ({stats['files_per_sec']} files/s)"
+        )
+        heaviest = sorted(self.subtrees.items(), key=lambda kv: kv[1][1], reverse=True)[:5]
+        if heaviest and self.dirs > 1:
+            summary = ", ".join(f"{name} ({files} files, {dirs} dirs)" for name, (dirs, files) in heaviest)
+            log.info(f"{self.label} heaviest subtrees: {summary}")
+        return stats
@@ -0,0 +1,237 @@
+import os
+import json
+import zlib
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from .paths import TOKEN_CACHE_PATH
+from .tokenizer import tokenizer
+from .token_estimator import TokenEstimator
+from .. import constants as c
+
+log = logging.getLogger("CodeMerger")
+
+_CACHE_MAGIC = b'CMTOK'
+_CACHE_VERSION = 1
+
+def _read_and_hash(full_path):
+    """Returns (raw bytes, SHA1 hex digest) of a file, or None if it cannot be read."""
+    try:
+        with open(full_path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    return data, hashlib.sha1(data).hexdigest()
+
+def _map_threaded(func, items):
+    """Maps 'func' over 'items' on up to TOKEN_BATCH_THREADS threads; file reads release the GIL."""
+    if len(items) < 2:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(c.TOKEN_BATCH_THREADS, len(items))) as pool:
+        return list(pool.map(func, items))
+
+class TokenCache:
+    """
+    Persistent cache of per-file token counts, shared by all projects, profiles and sessions.
+    Entries are keyed by the normalized absolute path and validated by (size, mtime_ns), so
+    a hit costs one stat. When the stat moved (touch, checkout, copy) the file is hashed, and
+    an unchanged SHA1 still avoids tokenizing; the hash also finds counts under other paths.
+    Every entry records the encoding it was counted with.
+    Least recently used entries are dropped beyond TOKEN_CACHE_MAX_ENTRIES.
+    The cached counts also calibrate 'estimator', which backs the 'estimate' token count mode.
+    """
+    def __init__(self, path, max_entries=c.TOKEN_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # path key -> [size, mtime_ns, sha1, encoding, tokens, lines]
+        self._entries = None
+        # (sha1, encoding) -> path key of an entry with that content
+        self._hash_keys = {}
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self.estimator = TokenEstimator()
+
+    @staticmethod
+    def _key(full_path):
+        return os.path.normcase(os.path.abspath(full_path))
+
+    def get_file_info(self, full_path):
+        """
+        Returns {'tokens', 'lines', 'hash', 'mtime', 'size'} for a file, read as UTF-8 like the merger
+        does, or None if it cannot be read. 'hash' is the SHA1 of the raw bytes (get_file_hash).
+        """
+        return self.get_files_info([full_path])[0]
+
+    def get_files_info(self, full_paths):
+        """
+        Batch form of get_file_info(), returning a list in the order of 'full_paths'.
+        Cache misses are read and hashed on a thread pool and tokenized with the batch encoder.
+        """
+        encoding = tokenizer.active_encoding
+        results = [None] * len(full_paths)
+        # (result index, path key, stat, previous entry) of files that need reading
+        misses = []
+        stats = []
+        for full_path in full_paths:
+            try:
+                stats.append(os.stat(full_path))
+            except OSError:
+                stats.append(None)
+
+        with self._lock:
+            self._ensure_loaded()
+            for i, (full_path, st) in enumerate(zip(full_paths, stats)):
+                if st is None:
+                    continue
+                key = self._key(full_path)
+                entry = self._entries.get(key)
+                if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns and entry[3] == encoding:
+                    self._entries.move_to_end(key)
+                    results[i] = self._info(entry, st)
+                else:
+                    misses.append((i, key, st, entry))
+
+        # Chunked so that only one batch of file contents is held in memory at a time
+        for start in range(0, len(misses), c.TOKEN_BATCH_SIZE):
+            batch = misses[start:start + c.TOKEN_BATCH_SIZE]
+            loaded = _map_threaded(_read_and_hash, [full_paths[i] for i, _, _, _ in batch])
+
+            # (result index, path key, stat, sha1, raw bytes) of files whose content is not known
+            unknown = []
+            with self._lock:
+                for (i, key, st, entry), read in zip(batch, loaded):
+                    if read is None:
+                        continue
+                    data, sha1 = read
+                    known = entry if entry and entry[2] == sha1 and entry[3] == encoding else None
+                    if known is None:
+                        other = self._entries.get(self._hash_keys.get((sha1, encoding)))
+                        if other and other[2] == sha1 and other[3] == encoding:
+                            known = other
+                    if known is None:
+                        unknown.append((i, key, st, sha1, data))
+                        continue
+                    entry = [st.st_size, st.st_mtime_ns, sha1, encoding, known[4], known[5]]
+                    self._store(key, entry)
+                    results[i] = self._info(entry, st)
+            if not unknown:
+                continue
+
+            texts = [data.decode('utf-8-sig', errors='ignore') for _, _, _, _, data in unknown]
+            counts = tokenizer.count_batch(texts, encoding)
+            with self._lock:
+                for (i, key, st, sha1, _), text, tokens in zip(unknown, texts, counts):
+                    entry = [st.st_size, st.st_mtime_ns, sha1, encoding, tokens, text.count('\n') + 1]
+                    if tokens >= 0:
+                        self._store(key, entry)
+                    results[i] = self._info(entry, st)
+        return results
+
+    def estimate_files(self, full_paths):
+        """
+        Returns {'tokens', 'exact'} per path (None if missing) without reading any file:
+        valid cache entries are exact, everything else is estimated from the file size.
+        """
+        encoding = tokenizer.active_encoding
+        results = []
+        with self._lock:
+            self._ensure_loaded()
+            for full_path in full_paths:
+                try:
+                    st = os.stat(full_path)
+                except OSError:
+                    results.append(None)
+                    continue
+                entry = self._entries.get(self._key(full_path))
+                if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns and entry[3] == encoding:
+                    results.append({'tokens': entry[4], 'exact': True})
+                else:
+                    results.append({'tokens': self.estimator.estimate(encoding, full_path, st.st_size), 'exact': False})
+        return results
+
+    @staticmethod
+    def _info(entry, st):
+        return {'tokens': entry[4], 'lines': entry[5], 'hash': entry[2], 'mtime': st.st_mtime, 'size': st.st_size}
+
+    def _store(self, key, entry):
+        old = self._entries.get(key)
+        if old:
+            self.estimator.observe(old[3], key, old[0], old[4], -1)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self._hash_keys[(entry[2], entry[3])] = key
+        self.estimator.observe(entry[3], key, entry[0], entry[4])
+        self._dirty = True
+        while len(self._entries) > self.max_entries:
+            old_key, old = self._entries.popitem(last=False)
+            self.estimator.observe(old[3], old_key, old[0], old[4], -1)
+            if self._hash_keys.get((old[2], old[3])) == old_key:
+                del self._hash_keys[(old[2], old[3])]
+
+    def _ensure_loaded(self):
+        if self._entries is not None:
+            return
+        self._entries = OrderedDict()
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return
+
+        header_size = len(_CACHE_MAGIC) + 1
+        if data[:len(_CACHE_MAGIC)] != _CACHE_MAGIC or data[header_size - 1:header_size] != bytes([_CACHE_VERSION]):
+            return
+        try:
+            rows = json.loads(zlib.decompress(data[header_size:]).decode('utf-8'))
+            for key, *entry in rows[-self.max_entries:]:
+                self._entries[key] = entry
+                self._hash_keys[(entry[2], entry[3])] = key
+                self.estimator.observe(entry[3], key, entry[0], entry[4])
+        except (zlib.error, ValueError, TypeError, IndexError) as e:
+            log.warning(f"Discarding corrupt token cache: {e}")
+            self._entries = OrderedDict()
+            self._hash_keys = {}
+            self.estimator.clear()
+
+    def save(self, force=False):
+        """Writes the cache if it changed, at most every TOKEN_CACHE_SAVE_INTERVAL_SECONDS unless forced."""
+        with self._lock:
+            if not self._dirty or self._entries is None:
+                return
+            if not force and time.monotonic() - self._last_save < c.TOKEN_CACHE_SAVE_INTERVAL_SECONDS:
+                return
+            rows = [[key] + entry for key, entry in self._entries.items()]
+            self._dirty = False
+            self._last_save = time.monotonic()
+
+        data = _CACHE_MAGIC + bytes([_CACHE_VERSION]) + zlib.compress(json.dumps(rows, separators=(',', ':')).encode('utf-8'), 6)
+        cache_dir = os.path.dirname(self.path)
+        temp_path = None
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=cache_dir, prefix=c.CODEMERGER_TEMP_PREFIX)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, self.path)
+            temp_path = None
+        except OSError as e:
+            log.warning(f"Could not write token cache: {e}")
+        finally:
+            if temp_path and os.path.exists(temp_path):
+                try: os.remove(temp_path)
+                except Exception: pass
+
+token_cache = TokenCache(TOKEN_CACHE_PATH)
+
+def get_file_token_info(full_path):
+    """Shortcut for token_cache.get_file_info()."""
+    return token_cache.get_file_info(full_path)
+
+def get_files_token_info(full_paths):
+    """Shortcut for token_cache.get_files_info()."""
+    return token_cache.get_files_info(full_paths)
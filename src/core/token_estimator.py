@@ -0,0 +1,48 @@
+import os
+import threading
+from .. import constants as c
+
+def _extension(path):
+    return os.path.splitext(path)[1].lower()
+
+class TokenEstimator:
+    """
+    Estimates token counts from file sizes with per-extension bytes-per-token ratios.
+    The ratios are calibrated from exact counts: the token cache reports every entry it
+    stores or drops, so the totals always describe the counts currently in the cache.
+    Totals are kept per encoding, since the same bytes tokenize differently in each.
+    An extension uses its own ratio once TOKEN_ESTIMATE_MIN_CALIBRATION_TOKENS of it were
+    counted, otherwise the ratio over all files, otherwise TOKEN_ESTIMATE_BYTES_PER_TOKEN.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (encoding, extension) -> [bytes, tokens]
+        self._totals = {}
+        # encoding -> [bytes, tokens] over all extensions
+        self._all = {}
+
+    def observe(self, encoding, path, size, tokens, sign=1):
+        """Adds an exact count to the calibration, or removes it again with sign=-1."""
+        if tokens <= 0:
+            return
+        with self._lock:
+            for totals in (self._totals.setdefault((encoding, _extension(path)), [0, 0]), self._all.setdefault(encoding, [0, 0])):
+                totals[0] += sign * size
+                totals[1] += sign * tokens
+
+    def bytes_per_token(self, encoding, path):
+        with self._lock:
+            for size, tokens in (self._totals.get((encoding, _extension(path)), (0, 0)), self._all.get(encoding, (0, 0))):
+                if tokens >= c.TOKEN_ESTIMATE_MIN_CALIBRATION_TOKENS:
+                    return size / tokens
+        return c.TOKEN_ESTIMATE_BYTES_PER_TOKEN
+
+    def estimate(self, encoding, path, size):
+        if size <= 0:
+            return 0
+        return max(1, round(size / self.bytes_per_token(encoding, path)))
+
+    def clear(self):
+        with self._lock:
+            self._totals = {}
+            self._all = {}
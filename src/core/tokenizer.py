@@ -0,0 +1,101 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from .. import constants as c
+
+log = logging.getLogger("CodeMerger")
+
+def _text_digest(text):
+    return hashlib.sha1(text.encode('utf-8', 'surrogatepass')).digest()
+
+class TokenizerRegistry:
+    """
+    Owns the tiktoken encodings used for token counts. tiktoken is only imported when an
+    encoding is first needed (or warmed up in the background), so startup does not pay for it.
+    'active_encoding' follows the loaded project and falls back to TOKEN_ENCODING_DEFAULT.
+    Recent results are memoized by text digest, up to TOKENIZER_MEMO_MAX_ENTRIES.
+    """
+    def __init__(self, memo_entries=c.TOKENIZER_MEMO_MAX_ENTRIES):
+        self.active_encoding = c.TOKEN_ENCODING_DEFAULT
+        self.memo_entries = memo_entries
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        # encoding name -> tiktoken Encoding, or None if it failed to load
+        self._encodings = {}
+        # (encoding name, text digest) -> token count
+        self._memo = OrderedDict()
+
+    def set_active_encoding(self, name):
+        """Selects the encoding for subsequent counts; unknown names fall back to the default."""
+        if name not in c.TOKEN_ENCODINGS:
+            name = c.TOKEN_ENCODING_DEFAULT
+        self.active_encoding = name
+        self.warm_up(name)
+
+    def get_encoding(self, name=None):
+        """Returns the tiktoken Encoding for 'name' (default: the active one), or None if unavailable."""
+        name = name or self.active_encoding
+        if name in self._encodings:
+            return self._encodings[name]
+        with self._load_lock:
+            if name not in self._encodings:
+                try:
+                    import tiktoken
+                    self._encodings[name] = tiktoken.get_encoding(name)
+                except Exception as e:
+                    log.warning(f"Tokenizer '{name}' is unavailable, token counts are disabled: {e}")
+                    self._encodings[name] = None
+        return self._encodings[name]
+
+    def warm_up(self, name=None):
+        """Loads an encoding on a background thread so the first count does not block."""
+        name = name or self.active_encoding
+        if name not in self._encodings:
+            threading.Thread(target=self.get_encoding, args=(name,), daemon=True).start()
+
+    def count(self, text, encoding=None):
+        """Token count of a string including special sequences, or -1 if no tokenizer is available."""
+        return self.count_batch([text], encoding)[0]
+
+    def count_batch(self, texts, encoding=None, num_threads=c.TOKEN_BATCH_THREADS):
+        """Token counts of many strings; memo misses go through tiktoken's threaded batch encoder."""
+        encoding = encoding or self.active_encoding
+        keys = [(encoding, _text_digest(text)) for text in texts]
+        counts = [None] * len(texts)
+        with self._lock:
+            for i, key in enumerate(keys):
+                count = self._memo.get(key)
+                if count is not None:
+                    self._memo.move_to_end(key)
+                    counts[i] = count
+        misses = [i for i, count in enumerate(counts) if count is None]
+        if not misses:
+            return counts
+
+        enc = self.get_encoding(encoding)
+        if enc is None:
+            for i in misses:
+                counts[i] = -1
+            return counts
+        try:
+            if len(misses) == 1:
+                results = [len(enc.encode(texts[misses[0]], disallowed_special=()))]
+            else:
+                results = [len(tokens) for tokens in enc.encode_batch([texts[i] for i in misses], num_threads=num_threads, disallowed_special=())]
+        except Exception as e:
+            log.warning(f"Token counting failed: {e}")
+            for i in misses:
+                counts[i] = -1
+            return counts
+
+        with self._lock:
+            for i, count in zip(misses, results):
+                counts[i] = count
+                self._memo[keys[i]] = count
+                self._memo.move_to_end(keys[i])
+            while len(self._memo) > self.memo_entries:
+                self._memo.popitem(last=False)
+        return counts
+
+tokenizer = TokenizerRegistry()
@@ -0,0 +1,77 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from .. import constants as c
+
+def path_set_digest(paths):
+    """Order-independent digest of a set of paths, small enough to sit in a cache key."""
+    return hashlib.sha1('\n'.join(sorted(paths)).encode('utf-8', 'surrogateescape')).hexdigest()
+
+def tree_cache_key(revision, file_extensions, filter_text, is_ext_filter, is_git_filter, selected_paths, unknown_files):
+    """
+    Identifies a built tree. Inventory revisions only ever increase, so a key never
+    matches a tree built from an older state of the disk.
+    """
+    return (
+        revision, filter_text.lower(), bool(is_ext_filter), bool(is_git_filter),
+        frozenset(file_extensions), path_set_digest(selected_paths), path_set_digest(unknown_files)
+    )
+
+def count_tree_nodes(nodes):
+    count = 0
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        count += 1
+        if node.get('children'):
+            stack.extend(node['children'])
+    return count
+
+class TreeCache:
+    """
+    Bounded LRU of built file trees, limited by entry count and by the total node count
+    of its entries. Cached values are shared with every caller and must not be mutated;
+    take() hands an entry over to a caller that wants to own (and patch) it.
+    """
+    def __init__(self, max_entries=c.TREE_CACHE_MAX_ENTRIES, max_nodes=c.TREE_CACHE_MAX_NODES):
+        self.max_entries = max_entries
+        self.max_nodes = max_nodes
+        self._lock = threading.Lock()
+        # key -> (value, node count)
+        self._entries = OrderedDict()
+        self._node_total = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def take(self, key):
+        """Removes and returns an entry, or None."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            self._node_total -= entry[1]
+            return entry[0]
+
+    def put(self, key, value, node_count):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._node_total -= old[1]
+            if node_count > self.max_nodes:
+                return
+            self._entries[key] = (value, node_count)
+            self._node_total += node_count
+            while len(self._entries) > self.max_entries or self._node_total > self.max_nodes:
+                _, (_, evicted_count) = self._entries.popitem(last=False)
+                self._node_total -= evicted_count
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._node_total = 0
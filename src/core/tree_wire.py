@@ -0,0 +1,31 @@
+def encode_tree(nodes):
+    """
+    Packs build_file_tree_data nodes into the compact wire format decoded by the frontend's
+    decodeTree (utils/treeWire.js). Keys are dropped and paths are rebuilt from the parent chain:
+      - folder: [name, [children...]]
+      - file:   [name, code], where code = reason index * 2 + is_new
+    'is_filtered' is implied by a non-empty filter reason.
+    Returns {'compact': 1, 'reasons': [filter reason strings, '' first], 'nodes': [...]}
+    """
+    reasons = ['']
+    reason_ids = {'': 0}
+
+    def _encode(level):
+        encoded = []
+        append = encoded.append
+        for node in level:
+            children = node.get('children')
+            if children is not None:
+                append([node['name'], _encode(children)])
+                continue
+            reason = node.get('filter_reason')
+            reason_id = 0
+            if reason:
+                reason_id = reason_ids.get(reason)
+                if reason_id is None:
+                    reason_id = reason_ids[reason] = len(reasons)
+                    reasons.append(reason)
+            append([node['name'], reason_id * 2 + (1 if node.get('is_new') else 0)])
+        return encoded
+
+    return {'compact': 1, 'reasons': reasons, 'nodes': _encode(nodes)}
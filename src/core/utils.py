@@ -1,8 +1,6 @@
 import os
 import json
-import fnmatch
 import hashlib
-import tiktoken
 import sys
 import ctypes
 import tempfile
@@ -11,22 +9,24 @@ from pathlib import Path
 from ..core.paths import (
     CONFIG_FILE_PATH, DEFAULT_FILETYPES_CONFIG_PATH, VERSION_FILE_PATH, PERSISTENT_DATA_DIR
 )
+from ..core.gitignore_matcher import get_rule_set
+from ..core.tokenizer import tokenizer
 from ..core.prompts import (
     DEFAULT_COPY_MERGED_PROMPT, DEFAULT_INTRO_PROMPT, DEFAULT_OUTRO_PROMPT
 )
 from ..constants import (
     TOKEN_COUNT_ENABLED_DEFAULT,
+    TOKEN_COUNT_MODE_DEFAULT,
+    TOKEN_BATCH_THREADS,
     ADD_ALL_WARNING_THRESHOLD_DEFAULT,
     NEW_FILE_ALERT_THRESHOLD_DEFAULT,
+    SCAN_WORKER_THREADS_DEFAULT,
     FONT_LUMINANCE_THRESHOLD
 )
 
 # Reference holds the lock for the application lifetime
 _instance_lock = None
 
-# Global Tiktoken instance to prevent re-initialization during batch operations
-_tiktoken_encoding = None
-
 def is_dev_mode():
     """Centralized check for development environment."""
     return "--dev" in sys.argv or os.environ.get('CM_DEV_MODE') == '1'
@@ -72,18 +72,13 @@ def strip_markdown_wrapper(text):
 
     return clean_text
 
-def get_token_count_for_text(text):
-    """Calculates the token count for a string"""
-    global _tiktoken_encoding
-    try:
-        if _tiktoken_encoding is None:
-            # Uses cl100k_base encoding for compatibility with gpt-4
-            _tiktoken_encoding = tiktoken.get_encoding("cl100k_base")
+def get_token_count_for_text(text, encoding=None):
+    """Calculates the token count for a string with the active (or given) encoding"""
+    return tokenizer.count(text, encoding)
 
-        # Counts all tokens including special sequences
-        return len(_tiktoken_encoding.encode(text, disallowed_special=()))
-    except Exception:
-        return -1
+def get_token_counts_for_texts(texts, num_threads=TOKEN_BATCH_THREADS, encoding=None):
+    """Calculates the token counts of many strings at once with tiktoken's threaded batch encoder"""
+    return tokenizer.count_batch(texts, encoding, num_threads=num_threads)
 
 def get_file_hash(full_path):
     """Calculates the SHA1 hash of file content"""
@@ -104,10 +99,12 @@ def _get_default_config_dict():
         'last_update_check': None,
         'enable_new_file_check': True,
         'new_file_check_interval': 5,
+        'scan_worker_threads': SCAN_WORKER_THREADS_DEFAULT,
         'copy_merged_prompt': DEFAULT_COPY_MERGED_PROMPT,
         'default_intro_prompt': DEFAULT_INTRO_PROMPT,
         'default_outro_prompt': DEFAULT_OUTRO_PROMPT,
         'token_count_enabled': TOKEN_COUNT_ENABLED_DEFAULT,
+        'token_count_mode': TOKEN_COUNT_MODE_DEFAULT,
         'token_limit': 0,
         'token_color_threshold': 4000,
         'enable_compact_mode_on_minimize': False,
@@ -334,75 +331,12 @@ def is_ignored(path, base_dir, gitignore_data):
     """
     Determines if a path should be ignored based on parsed .gitignore rules.
     Follows standard Git rules: anchored vs match-anywhere, negated patterns, and dir-only.
+    Matching runs on precompiled GitignoreMatcher objects cached per gitignore_data list.
     """
     if not gitignore_data:
         return False
 
-    path_norm = path.replace('\\', '/')
-    if '/.git/' in path_norm or path_norm.endswith('/.git'):
-        return True
-
-    is_ignored_flag = False
-    is_dir = None # Lazy-load directory status only if needed
-
-    # Process gitignores in order (top-down)
-    for gitignore_dir_str, patterns in gitignore_data:
-        if not path_norm.startswith(gitignore_dir_str):
-            continue
-
-        # Get path relative to this .gitignore's location
-        rel_path_str = path_norm[len(gitignore_dir_str):].lstrip('/')
-        if not rel_path_str:
-            continue
-
-        parts = rel_path_str.split('/')
-
-        for p_orig in patterns:
-            p = p_orig.strip()
-            if not p or p.startswith('#'):
-                continue
-
-            is_negated = p.startswith('!')
-            if is_negated:
-                p = p[1:]
-
-            # A pattern is anchored if it has a slash (other than a trailing one)
-            is_dir_only = p.endswith('/')
-            p_clean = p.rstrip('/')
-
-            # If pattern starts with /, it's anchored to the gitignore root.
-            # If it has a slash anywhere else (middle), it's also relative to the gitignore root.
-            is_anchored = '/' in p_clean or p_orig.startswith('/')
-            p_final = p_clean.lstrip('/')
-
-            match = False
-            if not is_anchored:
-                # MATCH ANYWHERE: Pattern matches against any component of the path
-                # e.g., 'vendor/' matches 'a/vendor/b'
-                if any(fnmatch.fnmatch(part, p_final) for part in parts[:-1]):
-                    match = True
-                elif fnmatch.fnmatch(parts[-1], p_final):
-                    if not is_dir_only:
-                        match = True
-                    else:
-                        if is_dir is None: is_dir = os.path.isdir(path)
-                        if is_dir: match = True
-            else:
-                # ANCHORED: Pattern is relative to the directory of the .gitignore
-                # e.g., '/httpdocs/vendor/' matches 'httpdocs/vendor/a' but not 'other/httpdocs/vendor'
-                if rel_path_str.startswith(p_final + '/'):
-                    match = True
-                elif fnmatch.fnmatch(rel_path_str, p_final):
-                    if not is_dir_only:
-                        match = True
-                    else:
-                        if is_dir is None: is_dir = os.path.isdir(path)
-                        if is_dir: match = True
-
-            if match:
-                is_ignored_flag = not is_negated
-
-    return is_ignored_flag
+    return get_rule_set(gitignore_data).is_ignored(path.replace('\\', '/'))
 
 def load_app_version():
     """
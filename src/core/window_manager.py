@@ -7,6 +7,8 @@ import json
 from src.core.paths import get_bundle_dir
 from src.core.updater import Updater
 from src.core.utils import load_app_version
+from src.core.token_cache import token_cache
+from src.core.tokenizer import tokenizer
 
 from src.core.window_geometry import WindowGeometry
 from src.core.window_splash import create_splash_window
@@ -136,6 +138,13 @@ class WindowManager:
             try: self.compact_window.evaluate_js(js)
             except Exception: pass
 
+    def broadcast_scan_progress(self, progress):
+        """Pushes throttled project scan statistics to the loading overlay of the main window."""
+        if not self._handshake_received or not self.main_window: return
+        js = f'window.dispatchEvent(new CustomEvent("cm-scan-progress", {{ detail: {json.dumps(progress)} }}))'
+        try: self.main_window.evaluate_js(js)
+        except Exception: pass
+
     def trigger_file_manager_in_main(self):
         """Forces the main window to open the File Manager."""
         if self.main_window:
@@ -237,6 +246,9 @@ class WindowManager:
 
         create_compact_window(self)
 
+        # Load the tokenizer now that the UI is up, so the first token count does not stall
+        tokenizer.warm_up()
+
         if self.updater:
             threading.Thread(target=self.updater.check_for_updates, daemon=True).start()
 
@@ -332,6 +344,9 @@ class WindowManager:
             self.api.app_state._save()
         except Exception: pass
 
+        try: token_cache.save(force=True)
+        except Exception: pass
+
         for win in [self.compact_window, self.splash_window]:
             if win:
                 try: win.destroy()